@@ -2,7 +2,7 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-from eden_clip_utils.clip_tools import CLIP_Interrogator  
+from eden_clip_utils.clip_tools import CLIP_Interrogator, CLIP_Interrogator_Batch
 from eden_img_utils.img_nodes import *
 from eden_img_utils.depth_nodes import *
 from eden_img_utils.gpt_nodes import *
@@ -19,6 +19,7 @@ WEB_DIRECTORY = "./js"
 
 NODE_CLASS_MAPPINGS = {
     "CLIP_Interrogator": CLIP_Interrogator,
+    "CLIP_Interrogator_Batch": CLIP_Interrogator_Batch,
     "Eden_IMG_padder": IMG_padder,
     "Eden_IMG_unpadder": IMG_unpadder,
     "IMG_scaler": IMG_scaler,
@@ -86,6 +87,8 @@ NODE_CLASS_MAPPINGS = {
     "Eden_RandomNumberSampler": Eden_RandomNumberSampler,
     "Eden_RandomFilepathSampler": Eden_RandomFilepathSampler,
     "Eden_AllMediaLoader": Eden_AllMediaLoader,
+    "Eden_VideoHandleLoader": Eden_VideoHandleLoader,
+    "Eden_VideoFrameRangeLoader": Eden_VideoFrameRangeLoader,
     "Eden_Save_Param_Dict": Eden_Save_Param_Dict,
     "OrganicFillNode": OrganicFillNode,
     "Eden_RGBA_to_RGB": Eden_RGBA_to_RGB
@@ -95,6 +98,8 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "Eden_RandomNumberSampler": "Random Number Sampler 🎲",
     "Eden_RandomFilepathSampler": "Random Filepath Sampler 🎲",
     "Eden_AllMediaLoader": "All Media Loader 📁",
+    "Eden_VideoHandleLoader": "Video Handle Loader 📁",
+    "Eden_VideoFrameRangeLoader": "Load Video Frames 📁",
     "Eden_Save_Param_Dict": "Save Param Dict 📁",
     "OrganicFillNode": "Organic Fill Mask Animation",
     "AnimatedShapeMaskNode": "Animated Shape Mask"
@@ -7,6 +7,7 @@ import requests
 import time
 import torch
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from PIL import Image
 from tqdm import tqdm
@@ -25,6 +26,11 @@ CAPTION_MODELS = {
 
 CACHE_URL_BASE = 'https://huggingface.co/pharmapsychotic/ci-preprocess/resolve/main/'
 
+# rough peak memory per image, used to size micro-batches when no batch size is configured
+CAPTION_BYTES_PER_IMAGE = 256 * 1024**2
+CLIP_BYTES_PER_IMAGE = 64 * 1024**2
+MAX_AUTO_BATCH_SIZE = 64
+
 @dataclass 
 class Config:
     # models can optionally be passed in directly
@@ -37,12 +43,14 @@ class Config:
     caption_max_length: int = 64
     caption_model_name: Optional[str] = 'blip-large' # use a key from CAPTION_MODELS or None
     caption_offload: bool = False
+    caption_batch_size: int = 0 # images per BLIP generate call in batch mode, 0 picks a size from free memory
     cache_dir: Optional[str] = None
 
     # clip settings
     clip_model_name: str = 'ViT-L-14/openai'
     clip_model_path: Optional[str] = None
     clip_offload: bool = False
+    clip_batch_size: int = 0    # images per CLIP encode_image call in batch mode, 0 picks a size from free memory
 
     # interrogator settings
     cache_path: str = 'cache'   # path to store cached text embeddings
@@ -51,6 +59,7 @@ class Config:
     data_path: str = os.path.join(os.path.dirname(__file__), 'data')
     device: str = ("mps" if torch.backends.mps.is_available() else "cuda" if torch.cuda.is_available() else "cpu")
     flavor_intermediate_count: int = 2048
+    text_embed_cache_size: int = 16384 # max number of prompt embeddings kept in the LRU cache, 0 disables it
     quiet: bool = False # when quiet progress bars are not shown
 
     def apply_low_vram_defaults(self):
@@ -67,6 +76,9 @@ class Interrogator():
         self.dtype = torch.float16 if self.device == 'cuda' else torch.float32
         self.caption_offloaded = True
         self.clip_offloaded = True
+        self._text_embed_cache = OrderedDict() # prompt string -> normalized CLIP text embedding
+        self.text_embed_cache_hits = 0
+        self.text_embed_cache_misses = 0
         self.load_caption_model()
         self.load_clip_model()
 
@@ -142,6 +154,7 @@ class Interrogator():
         self.movements = LabelTable(load_list(config.data_path, 'movements.txt'), "movements", self)
         self.trendings = LabelTable(trending_list, "trendings", self)
         self.negative = LabelTable(load_list(config.data_path, 'negative.txt'), "negative", self)
+        self.merged = _merge_tables([self.artists, self.flavors, self.mediums, self.movements, self.trendings], self)
 
         end_time = time.time()
         if not config.quiet:
@@ -190,49 +203,74 @@ class Interrogator():
                 break
             phrases.remove(flave)
 
+        if not self.config.quiet:
+            stats = self.text_embed_cache_stats()
+            print(f"{desc}: text embedding cache hit rate {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries)")
+
         return best_prompt
 
     def generate_caption(self, pil_image: Image, input_txt = "") -> str:
+        return self.generate_captions([pil_image], input_txt)[0]
+
+    def generate_captions(self, pil_images: List[Image.Image], input_txt = "", batch_size: Optional[int] = None) -> List[str]:
         assert self.caption_model is not None, "No caption model loaded."
         self._prepare_caption()
 
-        if input_txt:
-            inputs = self.caption_processor(images=pil_image, text=input_txt, return_tensors="pt").to(self.device)
-        else:
-            inputs = self.caption_processor(images=pil_image, return_tensors="pt").to(self.device)
+        batch_size = _micro_batch_size(batch_size or self.config.caption_batch_size, CAPTION_BYTES_PER_IMAGE, self.device)
+        captions = []
+        for start in tqdm(range(0, len(pil_images), batch_size), desc="Captioning", disable=self.config.quiet or len(pil_images) <= batch_size):
+            batch = pil_images[start:start+batch_size]
+            if input_txt:
+                inputs = self.caption_processor(images=batch, text=[input_txt]*len(batch), return_tensors="pt").to(self.device)
+            else:
+                inputs = self.caption_processor(images=batch, return_tensors="pt").to(self.device)
 
-        if not self.config.caption_model_name.startswith('git-'):
-            inputs = inputs.to(self.dtype)
+            if not self.config.caption_model_name.startswith('git-'):
+                inputs = inputs.to(self.dtype)
 
-        tokens  = self.caption_model.generate(**inputs, max_new_tokens=self.config.caption_max_length + len(input_txt))
-        caption = self.caption_processor.batch_decode(tokens, skip_special_tokens=True)[0].strip()
+            with torch.no_grad():
+                tokens = self.caption_model.generate(**inputs, max_new_tokens=self.config.caption_max_length + len(input_txt))
+            captions.extend([c.strip() for c in self.caption_processor.batch_decode(tokens, skip_special_tokens=True)])
 
         print(f"Generated {type(self.caption_model)} caption:")
-        print(caption)
+        for caption in captions:
+            print(caption)
         print('-------------------------------------')
 
-        return caption
+        return captions
 
     def image_to_features(self, image: Image) -> torch.Tensor:
-        self._prepare_clip()
-        images = self.clip_preprocess(image).unsqueeze(0).to(self.device)
-        with torch.no_grad(), torch.cuda.amp.autocast():
-            image_features = self.clip_model.encode_image(images)
-            image_features /= image_features.norm(dim=-1, keepdim=True)
-        return image_features
+        return self.images_to_features([image])
 
-    def interrogate_classic(self, image: Image, max_flavors: int=3, caption: Optional[str]=None) -> str:
+    def images_to_features(self, images: List[Image.Image], batch_size: Optional[int] = None) -> torch.Tensor:
+        """Encode images with CLIP in micro-batches, returns normalized features of shape [len(images), dim]."""
+        self._prepare_clip()
+        batch_size = _micro_batch_size(batch_size or self.config.clip_batch_size, CLIP_BYTES_PER_IMAGE, self.device)
+        features = []
+        for start in range(0, len(images), batch_size):
+            batch = torch.stack([self.clip_preprocess(image) for image in images[start:start+batch_size]]).to(self.device)
+            with torch.no_grad(), torch.cuda.amp.autocast():
+                image_features = self.clip_model.encode_image(batch)
+                image_features /= image_features.norm(dim=-1, keepdim=True)
+            features.append(image_features)
+        return torch.cat(features)
+
+    def interrogate_classic(self, image: Image, max_flavors: int=3, caption: Optional[str]=None, image_features: Optional[torch.Tensor]=None) -> str:
         """Classic mode creates a prompt in a standard format first describing the image, 
         then listing the artist, trending, movement, and flavor text modifiers."""
         caption = caption or self.generate_caption(image)
-        image_features = self.image_to_features(image)
+        if image_features is None:
+            image_features = self.image_to_features(image)
 
         medium = self.mediums.rank(image_features, 1)[0]
         artist = self.artists.rank(image_features, 1)[0]
         trending = self.trendings.rank(image_features, 1)[0]
         movement = self.movements.rank(image_features, 1)[0]
-        flaves = ", ".join(self.flavors.rank(image_features, max_flavors))
+        flaves = self.flavors.rank(image_features, max_flavors)
+        return self._classic_prompt(caption, medium, artist, trending, movement, flaves)
 
+    def _classic_prompt(self, caption: str, medium: str, artist: str, trending: str, movement: str, flaves: List[str]) -> str:
+        flaves = ", ".join(flaves)
         if caption.startswith(medium):
             prompt = f"{caption} {artist}, {trending}, {movement}, {flaves}"
         else:
@@ -240,14 +278,17 @@ class Interrogator():
 
         return _truncate_to_fit(prompt, self.tokenize)
 
-    def interrogate_fast(self, image: Image, max_flavors: int=32, caption: Optional[str]=None) -> str:
+    def interrogate_fast(self, image: Image, max_flavors: int=32, caption: Optional[str]=None, image_features: Optional[torch.Tensor]=None) -> str:
         """Fast mode simply adds the top ranked terms after a caption. It generally results in 
         better similarity between generated prompt and image than classic mode, but the prompts
         are less readable."""
         caption = caption or self.generate_caption(image)
-        image_features = self.image_to_features(image)
-        merged = _merge_tables([self.artists, self.flavors, self.mediums, self.movements, self.trendings], self)
-        tops = merged.rank(image_features, max_flavors)
+        if image_features is None:
+            image_features = self.image_to_features(image)
+        tops = self.merged.rank(image_features, max_flavors)
+        return self._fast_prompt(caption, tops)
+
+    def _fast_prompt(self, caption: str, tops: List[str]) -> str:
         return _truncate_to_fit(caption + ", " + ", ".join(tops), self.tokenize)
 
     def interrogate_negative(self, image: Image, max_flavors: int = 32) -> str:
@@ -259,46 +300,119 @@ class Interrogator():
         flaves = flaves + self.negative.labels
         return self.chain(image_features, flaves, max_count=max_flavors, reverse=True, desc="Negative chain")
 
-    def interrogate(self, image: Image, min_flavors: int=8, max_flavors: int=32, caption: Optional[str]=None) -> str:
+    def interrogate(self, image: Image, min_flavors: int=8, max_flavors: int=32, caption: Optional[str]=None, image_features: Optional[torch.Tensor]=None) -> str:
         caption = caption or self.generate_caption(image)
-        image_features = self.image_to_features(image)
+        if image_features is None:
+            image_features = self.image_to_features(image)
+
+        flaves = self.merged.rank(image_features, self.config.flavor_intermediate_count)
+        fast_prompt = self.interrogate_fast(image, max_flavors, caption=caption, image_features=image_features)
+        classic_prompt = self.interrogate_classic(image, max_flavors, caption=caption, image_features=image_features)
+        return self._full_prompt(image_features, caption, flaves, fast_prompt, classic_prompt, min_flavors, max_flavors)
 
-        merged = _merge_tables([self.artists, self.flavors, self.mediums, self.movements, self.trendings], self)
-        flaves = merged.rank(image_features, self.config.flavor_intermediate_count)
+    def _full_prompt(self, image_features: torch.Tensor, caption: str, flaves: List[str], fast_prompt: str,
+                     classic_prompt: str, min_flavors: int, max_flavors: int) -> str:
         best_prompt, best_sim = caption, self.similarity(image_features, caption)
         best_prompt = self.chain(image_features, flaves, best_prompt, best_sim, min_count=min_flavors, max_count=max_flavors, desc="Flavor chain")
 
-        fast_prompt = self.interrogate_fast(image, max_flavors, caption=caption)
-        classic_prompt = self.interrogate_classic(image, max_flavors, caption=caption)
         candidates = [caption, classic_prompt, fast_prompt, best_prompt]
         return candidates[np.argmax(self.similarities(image_features, candidates))]
 
-    def rank_top(self, image_features: torch.Tensor, text_array: List[str], reverse: bool=False) -> str:
+    def interrogate_batch(self, images: List[Image.Image], mode: str='fast', min_flavors: int=8, max_flavors: int=32,
+                          captions: Optional[List[Optional[str]]]=None, batch_size: Optional[int]=None) -> List[str]:
+        """Interrogate many images at once. Missing captions are generated and all images are
+        encoded in micro-batches, then every image is ranked against the label tables with one
+        matrix product per table. Full mode additionally runs the flavor chain, which is
+        inherently sequential and still happens per image."""
+        captions = list(captions) if captions is not None else [None] * len(images)
+        missing = [i for i, c in enumerate(captions) if not c]
+        if missing:
+            for i, caption in zip(missing, self.generate_captions([images[i] for i in missing], batch_size=batch_size)):
+                captions[i] = caption
+
+        image_features = self.images_to_features(images, batch_size=batch_size)
+
+        tops = self.merged.rank_batch(image_features, max_flavors)
+        fast_prompts = [self._fast_prompt(caption, t) for caption, t in zip(captions, tops)]
+        if mode == 'fast':
+            return fast_prompts
+
+        mediums = self.mediums.rank_batch(image_features, 1)
+        artists = self.artists.rank_batch(image_features, 1)
+        trendings = self.trendings.rank_batch(image_features, 1)
+        movements = self.movements.rank_batch(image_features, 1)
+        classic_flaves = self.flavors.rank_batch(image_features, max_flavors)
+        flaves = self.merged.rank_batch(image_features, self.config.flavor_intermediate_count)
+
+        prompts = []
+        for i, caption in enumerate(captions):
+            classic_prompt = self._classic_prompt(caption, mediums[i][0], artists[i][0], trendings[i][0], movements[i][0], classic_flaves[i])
+            prompts.append(self._full_prompt(image_features[i:i+1], caption, flaves[i], fast_prompts[i], classic_prompt, min_flavors, max_flavors))
+        return prompts
+
+    def encode_texts(self, texts: List[str]) -> torch.Tensor:
+        """Normalized CLIP text embeddings [len(texts), dim], served from the LRU cache where possible."""
         self._prepare_clip()
-        text_tokens = self.tokenize([text for text in text_array]).to(self.device)
+        cache_size = self.config.text_embed_cache_size
+        cache = self._text_embed_cache
+        # Hits and misses are counted per distinct string, so repeats within one call don't inflate the hit rate
+        unique_texts = list(dict.fromkeys(texts))
+        missing = [t for t in unique_texts if t not in cache]
+        self.text_embed_cache_misses += len(missing)
+        self.text_embed_cache_hits += len(unique_texts) - len(missing)
+
+        encoded = {}
+        for start in range(0, len(missing), self.config.chunk_size):
+            chunk = missing[start:start+self.config.chunk_size]
+            text_tokens = self.tokenize(chunk).to(self.device)
+            with torch.no_grad(), torch.cuda.amp.autocast():
+                text_features = self.clip_model.encode_text(text_tokens)
+                text_features /= text_features.norm(dim=-1, keepdim=True)
+            # Clone each row so a cached entry doesn't keep the whole chunk's storage alive
+            encoded.update(zip(chunk, [row.clone() for row in text_features.detach()]))
+
+        features = []
+        for text in texts:
+            if text in encoded:
+                embed = encoded[text]
+                if cache_size > 0:
+                    cache[text] = embed
+            else:
+                embed = cache[text]
+                cache.move_to_end(text)
+            features.append(embed)
+        while len(cache) > max(0, cache_size):
+            cache.popitem(last=False)
+        return torch.stack(features)
+
+    def text_embed_cache_stats(self) -> dict:
+        total = self.text_embed_cache_hits + self.text_embed_cache_misses
+        return {"hits": self.text_embed_cache_hits, "misses": self.text_embed_cache_misses,
+                "entries": len(self._text_embed_cache),
+                "hit_rate": self.text_embed_cache_hits / total if total else 0.0}
+
+    def clear_text_embed_cache(self):
+        self._text_embed_cache.clear()
+        self.text_embed_cache_hits = 0
+        self.text_embed_cache_misses = 0
+
+    def rank_top(self, image_features: torch.Tensor, text_array: List[str], reverse: bool=False) -> str:
+        text_features = self.encode_texts(text_array)
         with torch.no_grad(), torch.cuda.amp.autocast():
-            text_features = self.clip_model.encode_text(text_tokens)
-            text_features /= text_features.norm(dim=-1, keepdim=True)
             similarity = text_features @ image_features.T
             if reverse:
                 similarity = -similarity
         return text_array[similarity.argmax().item()]
 
     def similarity(self, image_features: torch.Tensor, text: str) -> float:
-        self._prepare_clip()
-        text_tokens = self.tokenize([text]).to(self.device)
+        text_features = self.encode_texts([text])
         with torch.no_grad(), torch.cuda.amp.autocast():
-            text_features = self.clip_model.encode_text(text_tokens)
-            text_features /= text_features.norm(dim=-1, keepdim=True)
             similarity = text_features @ image_features.T
         return similarity[0][0].item()
 
     def similarities(self, image_features: torch.Tensor, text_array: List[str]) -> List[float]:
-        self._prepare_clip()
-        text_tokens = self.tokenize([text for text in text_array]).to(self.device)
+        text_features = self.encode_texts(text_array)
         with torch.no_grad(), torch.cuda.amp.autocast():
-            text_features = self.clip_model.encode_text(text_tokens)
-            text_features /= text_features.norm(dim=-1, keepdim=True)
             similarity = text_features @ image_features.T
         return similarity.T[0].tolist()
 
@@ -325,37 +439,46 @@ class LabelTable():
         self.chunk_size = config.chunk_size
         self.config = config
         self.device = config.device
-        self.embeds = []
+        self.dtype = torch.float32 if self.device == 'cpu' or self.device == torch.device('cpu') else torch.float16
+        self.embeds = None
         self.labels = labels
         self.tokenize = ci.tokenize
 
+        if not labels:
+            return
+
         hash = hashlib.sha256(",".join(labels).encode()).hexdigest()
         sanitized_name = self.config.clip_model_name.replace('/', '_').replace('@', '_')
         self._load_cached(desc, hash, sanitized_name)
 
-        if len(self.labels) != len(self.embeds):
-            self.embeds = []
+        if self.embeds is None or len(self.labels) != len(self.embeds):
+            # preallocated once the embedding width is known, filled chunk by chunk on the device
+            self.embeds = None
             chunks = np.array_split(self.labels, max(1, len(self.labels)/config.chunk_size))
+            start = 0
             for chunk in tqdm(chunks, desc=f"Preprocessing {desc}" if desc else None, disable=self.config.quiet):
                 text_tokens = self.tokenize(chunk).to(self.device)
                 with torch.no_grad(), torch.cuda.amp.autocast():
                     text_features = clip_model.encode_text(text_tokens)
                     text_features /= text_features.norm(dim=-1, keepdim=True)
-                    text_features = text_features.half().cpu().numpy()
-                for i in range(text_features.shape[0]):
-                    self.embeds.append(text_features[i])
+                if self.embeds is None:
+                    self.embeds = torch.empty((len(self.labels), text_features.shape[-1]), dtype=torch.float16, device=self.device)
+                self.embeds[start:start+text_features.shape[0]] = text_features.half()
+                start += text_features.shape[0]
 
             if desc and self.config.cache_path:
                 os.makedirs(self.config.cache_path, exist_ok=True)
                 cache_filepath = os.path.join(self.config.cache_path, f"{sanitized_name}_{desc}.safetensors")
                 tensors = {
-                    "embeds": np.stack(self.embeds),
+                    "embeds": self.embeds.cpu().numpy(),
                     "hash": np.array([ord(c) for c in hash], dtype=np.int8)
                 }
                 save_file(tensors, cache_filepath)
+        else:
+            self.embeds = torch.from_numpy(np.ascontiguousarray(self.embeds)).to(self.device)
 
-        if self.device == 'cpu' or self.device == torch.device('cpu'):
-            self.embeds = [e.astype(np.float32) for e in self.embeds]
+        # fp16 matmuls are slow (or unsupported) on cpu, so cpu tables are kept in fp32
+        self.embeds = self.embeds.to(self.dtype).contiguous()
 
     def _load_cached(self, desc:str, hash:str, sanitized_name:str) -> bool:
         if self.config.cache_path is None or desc is None:
@@ -382,22 +505,20 @@ class LabelTable():
                 return False
             if 'hash' in tensors and 'embeds' in tensors:
                 if np.array_equal(tensors['hash'], np.array([ord(c) for c in hash], dtype=np.int8)):
-                    self.embeds = tensors['embeds']
-                    if len(self.embeds.shape) == 2:
-                        self.embeds = [self.embeds[i] for i in range(self.embeds.shape[0])]
-                    return True
+                    if tensors['embeds'].ndim == 2:
+                        self.embeds = tensors['embeds']
+                        return True
 
         return False
     
-    def _rank(self, image_features: torch.Tensor, text_embeds: torch.Tensor, top_count: int=1, reverse: bool=False) -> str:
+    def _rank(self, image_features: torch.Tensor, text_embeds: torch.Tensor, top_count: int=1, reverse: bool=False) -> List[int]:
         top_count = min(top_count, len(text_embeds))
-        text_embeds = torch.stack([torch.from_numpy(t) for t in text_embeds]).to(self.device)
-        with torch.cuda.amp.autocast():
-            similarity = image_features @ text_embeds.T
+        with torch.no_grad():
+            similarity = image_features.to(text_embeds.device, text_embeds.dtype) @ text_embeds.T
             if reverse:
                 similarity = -similarity
-        _, top_labels = similarity.float().cpu().topk(top_count, dim=-1)
-        return [top_labels[0][i].numpy() for i in range(top_count)]
+            _, top_labels = similarity.float().topk(top_count, dim=-1)
+        return top_labels[0].tolist()
 
     def rank(self, image_features: torch.Tensor, top_count: int=1, reverse: bool=False) -> List[str]:
         if len(self.labels) <= self.chunk_size:
@@ -407,16 +528,35 @@ class LabelTable():
         num_chunks = int(math.ceil(len(self.labels)/self.chunk_size))
         keep_per_chunk = int(self.chunk_size / num_chunks)
 
-        top_labels, top_embeds = [], []
+        top_idxs = []
         for chunk_idx in tqdm(range(num_chunks), disable=self.config.quiet):
             start = chunk_idx*self.chunk_size
             stop = min(start+self.chunk_size, len(self.embeds))
             tops = self._rank(image_features, self.embeds[start:stop], top_count=keep_per_chunk, reverse=reverse)
-            top_labels.extend([self.labels[start+i] for i in tops])
-            top_embeds.extend([self.embeds[start+i] for i in tops])
+            top_idxs.extend([start+i for i in tops])
 
+        top_embeds = self.embeds[torch.tensor(top_idxs, device=self.embeds.device)]
         tops = self._rank(image_features, top_embeds, top_count=top_count)
-        return [top_labels[i] for i in tops]
+        return [self.labels[top_idxs[i]] for i in tops]
+
+    def rank_batch(self, image_features: torch.Tensor, top_count: int=1, reverse: bool=False) -> List[List[str]]:
+        """
+        Rank every row of image_features [B, dim] against the whole table, one matmul per chunk of
+        image rows. The chunk size is picked so the [rows, N] similarity matrix fits in free memory.
+        """
+        top_count = min(top_count, len(self.labels))
+        # fp16/fp32 similarity row plus its fp32 copy
+        rows_per_chunk = _micro_batch_size(0, len(self.labels) * 8, self.embeds.device)
+        ranked = []
+        for start in range(0, image_features.shape[0], rows_per_chunk):
+            with torch.no_grad():
+                chunk = image_features[start:start+rows_per_chunk].to(self.embeds.device, self.embeds.dtype)
+                similarity = chunk @ self.embeds.T
+                if reverse:
+                    similarity = -similarity
+                _, top_labels = similarity.float().topk(top_count, dim=-1)
+            ranked.extend([[self.labels[i] for i in row] for row in top_labels.tolist()])
+        return ranked
 
 
 def _download_file(url: str, filepath: str, chunk_size: int = 4*1024*1024, quiet: bool = False):
@@ -435,12 +575,26 @@ def _download_file(url: str, filepath: str, chunk_size: int = 4*1024*1024, quiet
     progress.close()
 
 def _merge_tables(tables: List[LabelTable], ci: Interrogator) -> LabelTable:
+    """Concatenate tables into one index. The source tables are re-pointed at slices of the
+    merged matrix (m.offsets[i]:m.offsets[i+1]), so the embeddings are only stored once."""
     m = LabelTable([], None, ci)
+    m.offsets = [0]
     for table in tables:
         m.labels.extend(table.labels)
-        m.embeds.extend(table.embeds)
+        m.offsets.append(len(m.labels))
+    m.embeds = torch.cat([table.embeds for table in tables])
+    for table, start, stop in zip(tables, m.offsets[:-1], m.offsets[1:]):
+        table.embeds = m.embeds[start:stop]
     return m
 
+def _micro_batch_size(requested: int, bytes_per_image: int, device) -> int:
+    if requested and requested > 0:
+        return requested
+    if str(device).startswith('cuda') and torch.cuda.is_available():
+        free_bytes, _ = torch.cuda.mem_get_info()
+        return max(1, min(MAX_AUTO_BATCH_SIZE, int(free_bytes * 0.5) // bytes_per_image))
+    return 8
+
 def _prompt_at_max_len(text: str, tokenize) -> bool:
     tokens = tokenize([text])
     return tokens[0][-1] != 0
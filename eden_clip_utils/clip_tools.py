@@ -59,7 +59,7 @@ class CLIP_Interrogator:
 
         # ci expects a PIL image, but we get a torch tensor:
         if image.shape[0] > 1:
-            print("Warning: CLIP_Interrogator expects a single image, but got a batch. Using first image in batch.")
+            print("Warning: CLIP_Interrogator expects a single image, but got a batch. Using first image in batch (use CLIP_Interrogator_Batch to interrogate every image).")
             
         pil_image = comfy_tensor_to_pil(image[0])
 
@@ -68,8 +68,11 @@ class CLIP_Interrogator:
 
         ci = self.load_ci(clip_model_path=clip_model_dir)
 
+        # BLIP generation is the most expensive step, caption once and thread it through:
+        blip_caption = ci.generate_caption(pil_image)
+
         if prepend_blip_caption:
-            prepend_caption = None
+            prepend_caption = blip_caption
         else:
             prepend_caption = " " # make sure there is a space so that the prompt is not joined with the caption
 
@@ -78,28 +81,29 @@ class CLIP_Interrogator:
         else:
             prompt = ci.interrogate(pil_image, caption = prepend_caption)
 
-        blip_caption = ci.generate_caption(pil_image)
-            
         blip_caption = self.clean_prompt(blip_caption)
         prompt = self.clean_prompt(prompt)
 
         print(f"Interogated prompt: {prompt}")
 
         if save_prompt_to_txt_file:
-            if not save_prompt_to_txt_file.endswith(".txt"):
-                save_prompt_to_txt_file += ".txt"
+            self.save_prompt(prompt, save_prompt_to_txt_file)
 
-            # Make sure the path is absolute:
-            save_prompt_to_txt_file = os.path.abspath(save_prompt_to_txt_file)
+        return (prompt, blip_caption)
 
-            # Make sure the directory exists:
-            os.makedirs(os.path.dirname(save_prompt_to_txt_file), exist_ok=True)
-            
-            with open(save_prompt_to_txt_file, "w", encoding="utf-8") as f:
-                f.write(prompt)
-            print(f"Saved interrogated prompt to {save_prompt_to_txt_file}")
+    def save_prompt(self, prompt, save_prompt_to_txt_file):
+        if not save_prompt_to_txt_file.endswith(".txt"):
+            save_prompt_to_txt_file += ".txt"
 
-        return (prompt, blip_caption)
+        # Make sure the path is absolute:
+        save_prompt_to_txt_file = os.path.abspath(save_prompt_to_txt_file)
+
+        # Make sure the directory exists:
+        os.makedirs(os.path.dirname(save_prompt_to_txt_file), exist_ok=True)
+        
+        with open(save_prompt_to_txt_file, "w", encoding="utf-8") as f:
+            f.write(prompt)
+        print(f"Saved interrogated prompt to {save_prompt_to_txt_file}")
     
     def load_ci(self, clip_model_path=None):
         global global_interrogator_model
@@ -145,4 +149,105 @@ class CLIP_Interrogator:
         # convert to utf-8:
         text = text.encode('utf-8', 'ignore').decode('utf-8')
 
-        return text.strip()
\ No newline at end of file
+        return text.strip()
+
+
+class CLIP_Interrogator_Batch(CLIP_Interrogator):
+    """
+    Interrogates every image in the batch: captions and CLIP features are computed in
+    micro-batches and (in fast mode) all images are ranked against the label index at once.
+    Outputs one prompt / caption per image.
+    """
+    @classmethod
+    def INPUT_TYPES(s):
+        inputs = CLIP_Interrogator.INPUT_TYPES()
+        inputs["optional"] = {
+            "micro_batch_size": ("INT", {"default": 0, "min": 0, "max": 256}), # 0: pick from free memory
+        }
+        return inputs
+
+    RETURN_TYPES = ("STRING","STRING")
+    RETURN_NAMES = ("full_prompts", "blip_captions")
+    OUTPUT_IS_LIST = (True, True)
+    FUNCTION = "interrogate_batch"
+    CATEGORY = "Eden 🌱"
+
+    def interrogate_batch(self, image, mode="fast", keep_model_alive=True, prepend_blip_caption = True, save_prompt_to_txt_file=None, micro_batch_size=0):
+
+        self.keep_model_alive = keep_model_alive
+
+        print(f"Interrogating {image.shape[0]} images with mode {mode}, keep_model_alive={keep_model_alive}")
+
+        pil_images = [comfy_tensor_to_pil(img) for img in image]
+
+        clip_model_dir = os.path.join(str(folder_paths.models_dir), "clip")
+        os.makedirs(clip_model_dir, exist_ok=True)
+
+        ci = self.load_ci(clip_model_path=clip_model_dir)
+
+        # Passed per call: the interrogator (and its config) is shared with every other node
+        blip_captions = ci.generate_captions(pil_images, batch_size=micro_batch_size)
+
+        if prepend_blip_caption:
+            prepend_captions = blip_captions
+        else:
+            prepend_captions = [" "] * len(pil_images) # make sure there is a space so that the prompt is not joined with the caption
+
+        prompts = ci.interrogate_batch(pil_images, mode=mode, captions=prepend_captions, batch_size=micro_batch_size)
+
+        blip_captions = [self.clean_prompt(c) for c in blip_captions]
+        prompts = [self.clean_prompt(p) for p in prompts]
+
+        for prompt in prompts:
+            print(f"Interogated prompt: {prompt}")
+
+        if save_prompt_to_txt_file:
+            self.save_prompt("\n".join(prompts), save_prompt_to_txt_file)
+
+        return (prompts, blip_captions)
+
+
+if __name__ == "__main__":
+    # Run as "python -m eden_clip_utils.clip_tools" from a ComfyUI environment.
+    # --- Check that BLIP captioning runs once per image and node call (no models needed) ---
+    class _CountingInterrogator:
+        """Stands in for Interrogator: same caption contract (caption or self.generate_caption(image)), no models."""
+        def __init__(self):
+            self.caption_calls = 0
+
+        def generate_caption(self, pil_image, input_txt=""):
+            return self.generate_captions([pil_image])[0]
+
+        def generate_captions(self, pil_images, input_txt="", batch_size=None):
+            self.caption_calls += len(pil_images)
+            return ["a photo of a test image"] * len(pil_images)
+
+        def interrogate_fast(self, image, max_flavors=32, caption=None, image_features=None):
+            caption = caption or self.generate_caption(image)
+            return caption + ", fast flavor"
+
+        def interrogate(self, image, min_flavors=8, max_flavors=32, caption=None, image_features=None):
+            caption = caption or self.generate_caption(image)
+            return caption + ", full flavor"
+
+        def interrogate_batch(self, images, mode='fast', min_flavors=8, max_flavors=32, captions=None, batch_size=None):
+            captions = list(captions) if captions is not None else [None] * len(images)
+            missing = [i for i, c in enumerate(captions) if not c]
+            for i, caption in zip(missing, self.generate_captions([images[i] for i in missing])):
+                captions[i] = caption
+            return [c + f", {mode} flavor" for c in captions]
+
+    test_images = torch.rand(3, 16, 16, 3)
+    for mode in ["fast", "full"]:
+        for prepend_blip_caption in [True, False]:
+            node = CLIP_Interrogator()
+            node.ci = _CountingInterrogator()
+            node.interrogate(test_images[:1], mode=mode, prepend_blip_caption=prepend_blip_caption, save_prompt_to_txt_file="")
+            assert node.ci.caption_calls == 1, f"CLIP_Interrogator ({mode}, prepend={prepend_blip_caption}): {node.ci.caption_calls} caption calls"
+
+            batch_node = CLIP_Interrogator_Batch()
+            batch_node.ci = _CountingInterrogator()
+            batch_node.interrogate_batch(test_images, mode=mode, prepend_blip_caption=prepend_blip_caption, save_prompt_to_txt_file="")
+            n = test_images.shape[0]
+            assert batch_node.ci.caption_calls == n, f"CLIP_Interrogator_Batch ({mode}, prepend={prepend_blip_caption}): {batch_node.ci.caption_calls} caption calls for {n} images"
+    print("Caption call counts OK: one BLIP caption per image and node call")
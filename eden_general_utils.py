@@ -18,10 +18,14 @@ import logging
 import zipfile
 import tarfile
 import py7zr
-from typing import Union, List, Tuple, Optional, Dict
+from typing import Union, List, Tuple, Optional, Dict, Iterable, BinaryIO
 import shutil
-import tempfile
 import folder_paths
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+import threading
+from eden_img_utils.image_cache import get_decoded_image_cache, decode_image_uint8, draft_for_max_res, resize_image_max_size
+from eden_img_utils.directory_index import get_directory_index
 
 # wildcard trick is taken from pythongossss's
 class AnyType(str):
@@ -701,16 +705,9 @@ class Eden_RandomFilepathSampler:
         if not os.path.isdir(directory_path):
             raise ValueError(f"Directory not found: {directory_path}")
         
-        # Gather all files based on the include_subdirectories flag
-        all_files = []
-        
-        if include_subdirectories:
-            for root, _, files in os.walk(directory_path):
-                for file in files:
-                    all_files.append(os.path.join(root, file))
-        else:
-            all_files = [os.path.join(directory_path, f) for f in os.listdir(directory_path) 
-                        if os.path.isfile(os.path.join(directory_path, f))]
+        # Gather all files based on the include_subdirectories flag (from the shared directory index)
+        all_files = [path for path, _ in get_directory_index().list_files(
+            directory_path, recursive=include_subdirectories)]
         
         # Filter by extension if specified
         if file_extension:
@@ -914,26 +911,6 @@ def pil_to_tensor(image: Image.Image) -> torch.Tensor:
     
     return tensor
 
-def resize_image_max_size(image: Image.Image, max_res: int) -> Image.Image:
-    """Resize image if its width or height exceeds max_res, preserving aspect ratio."""
-    if max_res <= 0:
-        return image
-    
-    w, h = image.size
-    if w <= max_res and h <= max_res:
-        return image
-    
-    # Calculate new dimensions preserving aspect ratio
-    if w > h:
-        new_w = max_res
-        new_h = int(h * (max_res / w))
-    else:
-        new_h = max_res
-        new_w = int(w * (max_res / h))
-    
-    # Resize using Lanczos resampling for quality
-    return image.resize((new_w, new_h), Image.Resampling.LANCZOS)
-
 def load_path(path: str) -> Union[str, List[str]]:
     """
     Resolves a path that can be either:
@@ -978,14 +955,43 @@ def load_path(path: str) -> Union[str, List[str]]:
             
     raise FileNotFoundError(f"Could not find file or directory at {path} or {input_path}")
 
+def _pil_frame_to_np(pil_image: Image.Image, as_float: bool = True) -> np.ndarray:
+    """Convert an RGB PIL frame to a (H, W, C) array, float32 normalized 0-1 or raw uint8."""
+    np_frame = np.array(pil_image)
+    if as_float:
+        return np_frame.astype(np.float32) / 255.0
+    return np_frame
+
+def _cv_frame_to_np(frame_cv: np.ndarray, max_res: int = 0, as_float: bool = True) -> np.ndarray:
+    """Convert a BGR OpenCV frame to a resized RGB array (float32 normalized 0-1, or uint8)."""
+    frame_cv = cv2.cvtColor(frame_cv, cv2.COLOR_BGR2RGB)
+    pil_image = Image.fromarray(frame_cv)
+
+    if max_res > 0:
+        pil_image = resize_image_max_size(pil_image, max_res)
+
+    if pil_image.mode != 'RGB':
+        pil_image = pil_image.convert('RGB')
+    return _pil_frame_to_np(pil_image, as_float)
+
 def _extract_frames_from_video_generator(video_path: str, force_rate: float = 0.0,
-                                         image_load_cap: int = 0, max_res: int = 0):
+                                         image_load_cap: int = 0, max_res: int = 0,
+                                         decode_mode: str = "sequential", as_float: bool = True):
     """
     Extracts frames from a video file using OpenCV, yielding them as NumPy arrays.
+
+    decode_mode:
+        "sequential": reads the stream in order with grab() and only retrieve()s (decodes to BGR)
+                      the frames that are kept. Linear in the clip length.
+        "seek":       seeks with CAP_PROP_POS_FRAMES before every kept frame. Every seek re-decodes
+                      from the previous keyframe, which gets quadratic on long-GOP footage.
     Yields:
         Tuple: (fps, num_frames_to_yield, first_frame_width, first_frame_height)
-        np.ndarray: Processed frame (H, W, C) as float32, normalized 0-1.
+        np.ndarray: Processed frame (H, W, C) as float32, normalized 0-1 (uint8 if as_float=False).
     """
+    if decode_mode not in ("sequential", "seek"):
+        raise ValueError(f"Unknown decode_mode: {decode_mode}")
+
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise ValueError(f"Cannot open video file: {video_path}")
@@ -1013,18 +1019,15 @@ def _extract_frames_from_video_generator(video_path: str, force_rate: float = 0.
 
     # Yield metadata: fps to report, num_frames_actually_yielded, first_frame_w, first_frame_h
     # For first_frame_w, first_frame_h, we need to read one frame
-    first_frame_pil = None
+    first_frame_np = None
     first_frame_w, first_frame_h = 0, 0
 
     if num_frames_to_yield > 0:
         cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # Start from the beginning for the first frame
         ret, frame_cv = cap.read()
         if ret:
-            frame_cv = cv2.cvtColor(frame_cv, cv2.COLOR_BGR2RGB)
-            first_frame_pil = Image.fromarray(frame_cv)
-            if max_res > 0:
-                first_frame_pil = resize_image_max_size(first_frame_pil, max_res)
-            first_frame_w, first_frame_h = first_frame_pil.size
+            first_frame_np = _cv_frame_to_np(frame_cv, max_res, as_float)
+            first_frame_h, first_frame_w = first_frame_np.shape[:2]
         else: # Video might be empty or unreadable
             cap.release()
             raise ValueError(f"Could not read the first frame from video: {video_path}")
@@ -1033,38 +1036,40 @@ def _extract_frames_from_video_generator(video_path: str, force_rate: float = 0.
     yield (reported_fps, num_frames_to_yield, first_frame_w, first_frame_h)
 
     # Now yield the first frame if it was processed
-    if first_frame_pil:
-        if first_frame_pil.mode != 'RGB':
-            first_frame_pil = first_frame_pil.convert('RGB')
-        np_frame = np.array(first_frame_pil).astype(np.float32) / 255.0
-        yield np_frame
+    if first_frame_np is not None:
+        yield first_frame_np
         frames_yielded_count = 1
         current_frame_index_in_video = frame_interval # Next frame to read
     else: # Should not happen if num_frames_to_yield > 0 and first frame read failed
         frames_yielded_count = 0
         current_frame_index_in_video = 0
 
+    # The stream is positioned right after the first frame at this point
+    next_frame_in_stream = 1 if first_frame_np is not None else 0
 
     while frames_yielded_count < num_frames_to_yield:
         if current_frame_index_in_video >= total_frames_in_video:
-            break 
-            
-        cap.set(cv2.CAP_PROP_POS_FRAMES, current_frame_index_in_video)
-        ret, frame_cv = cap.read()
+            break
+
+        if decode_mode == "seek":
+            cap.set(cv2.CAP_PROP_POS_FRAMES, current_frame_index_in_video)
+            ret, frame_cv = cap.read()
+        else:
+            # Demux/decode the skipped frames without converting them, then decode the kept one
+            ret = True
+            while ret and next_frame_in_stream < current_frame_index_in_video:
+                ret = cap.grab()
+                next_frame_in_stream += 1
+            if ret:
+                ret = cap.grab()
+                next_frame_in_stream += 1
+            if ret:
+                ret, frame_cv = cap.retrieve()
 
         if not ret:
             break
 
-        frame_cv = cv2.cvtColor(frame_cv, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(frame_cv)
-
-        if max_res > 0:
-            pil_image = resize_image_max_size(pil_image, max_res)
-        
-        if pil_image.mode != 'RGB':
-            pil_image = pil_image.convert('RGB')
-        np_frame = np.array(pil_image).astype(np.float32) / 255.0
-        yield np_frame
+        yield _cv_frame_to_np(frame_cv, max_res, as_float)
 
         frames_yielded_count += 1
         current_frame_index_in_video += frame_interval
@@ -1072,12 +1077,12 @@ def _extract_frames_from_video_generator(video_path: str, force_rate: float = 0.
     cap.release()
 
 def _process_gif_generator(gif_path: str, force_rate: float = 0.0,
-                           image_load_cap: int = 0, max_res: int = 0):
+                           image_load_cap: int = 0, max_res: int = 0, as_float: bool = True):
     """
     Processes an animated GIF, yielding frames as NumPy arrays.
     Yields:
         Tuple: (fps, num_frames_to_yield, first_frame_width, first_frame_height)
-        np.ndarray: Processed frame (H, W, C) as float32, normalized 0-1.
+        np.ndarray: Processed frame (H, W, C) as float32, normalized 0-1 (uint8 if as_float=False).
     """
     gif = Image.open(gif_path)
 
@@ -1088,7 +1093,7 @@ def _process_gif_generator(gif_path: str, force_rate: float = 0.0,
         
         img_rgb = gif.convert("RGB")
         w, h = img_rgb.size
-        np_frame = np.array(img_rgb).astype(np.float32) / 255.0
+        np_frame = _pil_frame_to_np(img_rgb, as_float)
         yield (0.0, 1, w, h) # fps, count, w, h
         yield np_frame
         return
@@ -1146,36 +1151,190 @@ def _process_gif_generator(gif_path: str, force_rate: float = 0.0,
         if max_res > 0:
             frame_pil = resize_image_max_size(frame_pil, max_res)
         
-        np_frame = np.array(frame_pil).astype(np.float32) / 255.0
+        np_frame = _pil_frame_to_np(frame_pil, as_float)
         yield np_frame
         frames_yielded_count += 1
 
 extract_frames_from_video = _extract_frames_from_video_generator
 process_gif = _process_gif_generator
 
-def load_single_image(image_path: str, max_res: int = 0) -> torch.Tensor:
+def _frames_to_tensor(frame_generator, num_frames: int, width: int, height: int) -> torch.Tensor:
+    """
+    Collects uint8 (H, W, C) frames from a frame generator into a single preallocated
+    float32 tensor (B, H, W, C) normalized 0-1.
+
+    Each frame is written into its slot and converted in place, so peak host memory stays
+    close to the size of the output tensor instead of holding a list of float32 frames plus
+    a stacked copy of them.
+    """
+    images = torch.empty((num_frames, height, width, 3), dtype=torch.float32)
+
+    count = 0
+    for np_frame in frame_generator:
+        if count >= num_frames:
+            break
+        if np_frame.shape != (height, width, 3):
+            raise ValueError(f"Frame {count} has shape {np_frame.shape}, expected {(height, width, 3)}")
+        images[count].copy_(torch.from_numpy(np_frame)).div_(255.0)
+        count += 1
+
+    # The container can report more frames than it actually decodes
+    # (slicing keeps the original storage instead of copying it)
+    if count < num_frames:
+        images = images[:count]
+
+    return images
+
+def load_single_image(image_path: Union[str, BinaryIO], max_res: int = 0,
+                      reduced_decode: bool = True, use_cache: bool = True) -> torch.Tensor:
     """
     Load a single image and convert to tensor.
     
     Args:
-        image_path: Path to the image file
+        image_path: Path to the image file, or an open binary file object
         max_res: Maximum resolution for width or height (0 means no resize)
+        reduced_decode: Decode JPEGs at a reduced scale when max_res forces a downscale
+        use_cache: Go through the persistent decoded image cache (file paths only)
     
     Returns:
-        Image as tensor (B,C,H,W)
+        Image as tensor (B,H,W,C)
     """
-    # Open and process image
-    img = Image.open(image_path)
-    img = ImageOps.exif_transpose(img)
-    
-    # Resize if needed
-    if max_res > 0:
-        img = resize_image_max_size(img, max_res)
-    
-    # Convert to tensor
-    tensor = pil_to_tensor(img)
+    if use_cache and isinstance(image_path, str):
+        np_image = get_decoded_image_cache().load(
+            image_path, max_res,
+            lambda p: decode_image_uint8(p, max_res, reduced_decode),
+            exif_transpose=True,
+            variant=f"media_loader|reduced_decode={int(reduced_decode)}",
+        )
+    else:
+        np_image = decode_image_uint8(image_path, max_res, reduced_decode)
     
-    return tensor
+    # Convert to tensor with batch dimension (B,H,W,C), normalized to 0-1
+    return torch.from_numpy(np_image.astype(np.float32) / 255.0).unsqueeze(0)
+
+def _default_decode_workers() -> int:
+    """Default number of threads for image decoding (PIL and OpenCV release the GIL while decoding)."""
+    return min(32, os.cpu_count() or 1)
+
+def load_images_parallel(image_paths: Iterable[Union[str, BinaryIO]], max_res: int = 0,
+                         num_workers: int = 0) -> List[Optional[torch.Tensor]]:
+    """
+    Load a list of images with a thread pool, preserving the input order.
+
+    Args:
+        image_paths: Paths (or binary file objects) of the images to load. Generators are
+                     consumed lazily: at most 2 * num_workers sources are in flight at a
+                     time, so producing the next source overlaps with decoding without
+                     holding every source in memory.
+        max_res: Maximum resolution for width or height (0 means no resize)
+        num_workers: Number of decode threads (0 means one per CPU core, 1 disables threading)
+
+    Returns:
+        List with one (1,H,W,C) tensor per path, or None where the image failed to load
+    """
+    def _load(img_path):
+        try:
+            return load_single_image(img_path, max_res)
+        except Exception as e:
+            logger.warning(f"Failed to load image {getattr(img_path, 'name', img_path)}: {e}")
+            return None
+
+    if num_workers <= 0:
+        num_workers = _default_decode_workers()
+    if hasattr(image_paths, '__len__'):
+        num_workers = min(num_workers, len(image_paths))
+
+    if num_workers <= 1:
+        return [_load(p) for p in image_paths]
+
+    max_in_flight = 2 * num_workers
+    results = []
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for p in image_paths:
+            if len(pending) >= max_in_flight:
+                results.append(pending.popleft().result())
+            pending.append(executor.submit(_load, p))
+        while pending:
+            results.append(pending.popleft().result())
+    return results
+
+ARCHIVE_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+# py7zr can only decompress a list of members at once, so 7z archives are read in chunks of
+# this many members to bound memory. Each chunk restarts decompression of solid blocks.
+SEVEN_ZIP_READ_CHUNK = 64
+
+def _list_archive_members(archive) -> List[Tuple[str, float]]:
+    """List (member_name, modified_timestamp) for all regular files in an open zip/tar/7z archive."""
+    if isinstance(archive, zipfile.ZipFile):
+        return [(info.filename, datetime(*info.date_time).timestamp())
+                for info in archive.infolist() if not info.is_dir()]
+    elif isinstance(archive, tarfile.TarFile):
+        return [(member.name, float(member.mtime))
+                for member in archive.getmembers() if member.isfile()]
+    else:  # py7zr.SevenZipFile
+        return [(info.filename, info.creationtime.timestamp() if info.creationtime else 0.0)
+                for info in archive.list() if not info.is_directory]
+
+def _select_archive_image_members(members: List[Tuple[str, float]]) -> List[Tuple[str, float]]:
+    """
+    Pick the image members the same way a directory load of the extracted archive would:
+    images at the archive root, or inside its single top-level folder if that is all there is.
+    """
+    def _normalize(name):
+        name = name.replace("\\", "/")
+        while name.startswith("./"):
+            name = name[2:]
+        return name.lstrip("/")
+
+    normalized_names = [_normalize(name) for name, _ in members]
+    top_level = {name.split("/", 1)[0] for name in normalized_names if name}
+
+    root = ""
+    if len(top_level) == 1:
+        only_entry = next(iter(top_level))
+        if any(name.startswith(only_entry + "/") for name in normalized_names):
+            root = only_entry + "/"
+
+    selected = []
+    for (name, mtime), normalized_name in zip(members, normalized_names):
+        if not normalized_name.startswith(root):
+            continue
+        relative_name = normalized_name[len(root):]
+        if "/" in relative_name or relative_name.startswith("."):
+            continue
+        if relative_name.lower().endswith(ARCHIVE_IMAGE_EXTENSIONS):
+            selected.append((name, mtime))
+    return selected
+
+def _iter_archive_member_files(archive, archive_names: List[str]):
+    """
+    Yield the given archive members as in-memory binary file objects, in order.
+    zip and tar members are read one at a time. 7z members are read in chunks of
+    SEVEN_ZIP_READ_CHUNK members (uses SevenZipFile.read(targets=...), which requires py7zr < 1.0).
+    """
+    if isinstance(archive, zipfile.ZipFile):
+        for name in archive_names:
+            data = BytesIO(archive.read(name))
+            data.name = name
+            yield data
+    elif isinstance(archive, tarfile.TarFile):
+        for name in archive_names:
+            data = BytesIO(archive.extractfile(name).read())
+            data.name = name
+            yield data
+    else:  # py7zr.SevenZipFile decompresses the requested members in a single pass per chunk
+        for start in range(0, len(archive_names), SEVEN_ZIP_READ_CHUNK):
+            chunk = archive_names[start:start + SEVEN_ZIP_READ_CHUNK]
+            archive.reset()
+            contents = archive.read(targets=chunk)
+            for name in chunk:
+                data = contents[name]
+                data.seek(0)
+                data.name = name
+                yield data
+            del contents
 
 def concat_image_tensors(tensors: List[torch.Tensor]) -> torch.Tensor:
     """Concatenate multiple image tensors along the batch dimension."""
@@ -1220,6 +1379,15 @@ class Eden_AllMediaLoader:
                     "default": "None",
                     "tooltip": "Method to sort multiple images."
                 })
+            },
+            "optional": {
+                "num_workers": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 64,
+                    "step": 1,
+                    "tooltip": "Number of threads used to decode multiple images. 0 means one per CPU core."
+                })
             }
         }
 
@@ -1234,11 +1402,12 @@ class Eden_AllMediaLoader:
     - Extracts frames at a specific FPS rate with force_rate
     - Automatically resizes images that exceed max_res
     - Supports basic sorting options
+    - Decodes multiple images in parallel (num_workers threads)
     - Returns tensors in ComfyUI format [B, H, W, C]
     """
     
     def load_media(self, path: str, image_load_cap: int = 0, force_rate: float = 0.0, 
-                   max_res: int = 0, sort: str = "None") -> Tuple:
+                   max_res: int = 0, sort: str = "None", num_workers: int = 0) -> Tuple:
         """
         Main function to load media from various sources.
         
@@ -1248,6 +1417,7 @@ class Eden_AllMediaLoader:
             force_rate: Target FPS for videos/GIFs (0 means use original rate)
             max_res: Maximum resolution (0 means no resize)
             sort: Sorting method for directories
+            num_workers: Number of image decode threads (0 means one per CPU core)
             
         Returns:
             Tuple of (image tensor, width, height, count, filename, filepath, fps)
@@ -1257,7 +1427,7 @@ class Eden_AllMediaLoader:
             
             # If we got a list of paths from wildcard matching
             if isinstance(resolved_path, list):
-                return self.process_image_list(resolved_path, image_load_cap, max_res, sort)
+                return self.process_image_list(resolved_path, image_load_cap, max_res, sort, num_workers)
             
             # Handle single path (file or directory)
             path = resolved_path
@@ -1265,23 +1435,20 @@ class Eden_AllMediaLoader:
             
             # Handle directories
             if os.path.isdir(path):
-                return self.load_from_directory(path, image_load_cap, max_res, sort)
+                return self.load_from_directory(path, image_load_cap, max_res, sort, num_workers)
             
             # Handle videos
             elif path.lower().endswith(('.mp4', '.mov')):
                 frame_generator = extract_frames_from_video(
-                    path, force_rate, image_load_cap, max_res
+                    path, force_rate, image_load_cap, max_res, as_float=False
                 )
                 metadata = next(frame_generator)
-                fps, _, _, _ = metadata # width and height will be taken from stacked tensor
+                fps, num_frames, first_w, first_h = metadata
 
-                processed_frames_np = list(frame_generator)
+                images = _frames_to_tensor(frame_generator, num_frames, first_w, first_h)
 
-                if not processed_frames_np:
+                if images.shape[0] == 0:
                     raise ValueError(f"No frames extracted from video: {path}")
-
-                images_np_array = np.stack(processed_frames_np, axis=0)
-                images = torch.from_numpy(images_np_array)
                 
                 # Get dimensions from the first frame
                 b, h, w, c = images.shape # B is frame_count
@@ -1293,32 +1460,28 @@ class Eden_AllMediaLoader:
             # Handle GIFs
             elif path.lower().endswith('.gif'):
                 gif_generator = process_gif(
-                    path, force_rate, image_load_cap, max_res
+                    path, force_rate, image_load_cap, max_res, as_float=False
                 )
                 metadata = next(gif_generator)
-                fps, _, _, _ = metadata # width and height will be taken from stacked tensor
+                fps, num_frames, first_w, first_h = metadata
 
-                processed_frames_np = list(gif_generator)
+                images = _frames_to_tensor(gif_generator, num_frames, first_w, first_h)
 
-                if not processed_frames_np:
+                if images.shape[0] == 0:
                     # This can happen if GIF was non-animated and yielded 0 frames before metadata
                     # or if image_load_cap was 0 for a non-animated GIF.
                     # The generator itself handles non-animated by yielding 1 frame.
                     # Let's re-check process_gif logic if this error occurs.
-                    # For now, assume list has items if generator didn't raise error.
+                    # For now, assume the tensor has frames if generator didn't raise error.
                     if os.path.getsize(path) > 0 : # Check if file has content
                          # if it's a single frame gif, it should have been handled by the gen.
                          # if it's animated and no frames, then it's an issue.
                          # The new _process_gif_generator handles single frame gifs correctly by yielding one frame.
-                         # So if processed_frames_np is empty here, it is likely an issue.
+                         # So if no frames were collected here, it is likely an issue.
                          raise ValueError(f"No frames extracted from GIF: {path}. It might be empty or corrupt.")
                     else: # File is empty
                         raise ValueError(f"GIF file is empty: {path}")
 
-
-                images_np_array = np.stack(processed_frames_np, axis=0)
-                images = torch.from_numpy(images_np_array)
-                
                 b, h, w, c = images.shape # B is frame_count
                 frame_count = b
                 file_name = os.path.basename(path).rsplit('.', 1)[0]
@@ -1327,7 +1490,7 @@ class Eden_AllMediaLoader:
             
             # Handle archives (zip, tar, 7z)
             elif path.lower().endswith(('.zip', '.tar', '.tar.gz', '.tar.bz2', '.7z')):
-                return self.load_from_archive(path, image_load_cap, max_res, sort)
+                return self.load_from_archive(path, image_load_cap, max_res, sort, num_workers)
             
             # Handle single image
             else:
@@ -1341,35 +1504,45 @@ class Eden_AllMediaLoader:
             logger.error(f"Error loading media: {e}")
             raise
     
-    def process_image_list(self, image_paths: List[str], image_load_cap: int = 0, 
-                          max_res: int = 0, sort: str = "None") -> Tuple:
-        """Process a list of image paths."""
-        if not image_paths:
-            raise ValueError("No image paths provided")
+    @staticmethod
+    def sort_and_cap(items: List[Any], sort: str, image_load_cap: int,
+                     name_key, ctime_key, mtime_key) -> List[Any]:
+        """Sort items with the selected method and apply image_load_cap."""
+        items = list(items)
         
         # Apply sorting
         if sort == "alphabetical":
-            image_paths.sort(key=lambda x: x.lower())
+            items.sort(key=name_key)
         elif sort == "date_created":
-            image_paths.sort(key=lambda x: os.path.getctime(x))
+            items.sort(key=ctime_key)
         elif sort == "date_modified":
-            image_paths.sort(key=lambda x: os.path.getmtime(x))
+            items.sort(key=mtime_key)
         elif sort == "random":
             random.seed(0)  # Fixed seed for reproducibility
-            random.shuffle(image_paths)
+            random.shuffle(items)
         
         # Apply image_load_cap
         if image_load_cap > 0:
-            image_paths = image_paths[:image_load_cap]
+            items = items[:image_load_cap]
         
-        # Load all images
-        frames = []
-        for img_path in image_paths:
-            try:
-                tensor = load_single_image(img_path, max_res)
-                frames.append(tensor)
-            except Exception as e:
-                logger.warning(f"Failed to load image {img_path}: {e}")
+        return items
+    
+    def process_image_list(self, image_paths: List[str], image_load_cap: int = 0, 
+                          max_res: int = 0, sort: str = "None", num_workers: int = 0) -> Tuple:
+        """Process a list of image paths."""
+        if not image_paths:
+            raise ValueError("No image paths provided")
+        
+        image_paths = self.sort_and_cap(
+            image_paths, sort, image_load_cap,
+            name_key=lambda x: x.lower(),
+            ctime_key=os.path.getctime,
+            mtime_key=os.path.getmtime,
+        )
+        
+        # Load all images (in parallel, order is preserved and failed images are skipped)
+        frames = load_images_parallel(image_paths, max_res, num_workers)
+        frames = [f for f in frames if f is not None]
         
         if not frames:
             raise ValueError("No valid images found in the provided paths")
@@ -1386,51 +1559,302 @@ class Eden_AllMediaLoader:
         return (images, w, h, len(frames), file_name, parent_directory, 0.0)
     
     def load_from_directory(self, directory: str, image_load_cap: int = 0, 
-                           max_res: int = 0, sort: str = "None") -> Tuple:
+                           max_res: int = 0, sort: str = "None", num_workers: int = 0) -> Tuple:
         """Load images from a directory."""
-        # Get all image files
+        # Get all image files (lower or upper case extensions, hidden files skipped like glob does)
         image_extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
-        image_files = []
-        
-        for ext in image_extensions:
-            image_files.extend(glob.glob(os.path.join(directory, f"*{ext}")))
-            image_files.extend(glob.glob(os.path.join(directory, f"*{ext.upper()}")))
+        image_extensions = image_extensions + [ext.upper() for ext in image_extensions]
+        image_files = [path for path, entry in get_directory_index().list_files(directory, extensions=image_extensions)
+                       if not entry.name.startswith('.')]
         
         if not image_files:
             raise ValueError(f"No valid image files found in directory {directory}")
         
         # Process the image list
-        return self.process_image_list(image_files, image_load_cap, max_res, sort)
+        return self.process_image_list(image_files, image_load_cap, max_res, sort, num_workers)
     
     def load_from_archive(self, archive_path: str, image_load_cap: int = 0, 
-                         max_res: int = 0, sort: str = "None") -> Tuple:
-        """Extract and load images from an archive file."""
-        # Create temporary directory
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Extract archive
-            if archive_path.lower().endswith('.zip'):
-                with zipfile.ZipFile(archive_path, 'r') as z:
-                    z.extractall(temp_dir)
-            elif archive_path.lower().endswith('.7z'):
-                with py7zr.SevenZipFile(archive_path, mode='r') as z:
-                    z.extractall(path=temp_dir)
-            else:  # tar, tar.gz, tar.bz2
-                with tarfile.open(archive_path, 'r') as t:
-                    t.extractall(temp_dir)
-            
-            # Check if there's a single directory in the extracted content
-            contents = os.listdir(temp_dir)
-            if len(contents) == 1 and os.path.isdir(os.path.join(temp_dir, contents[0])):
-                temp_dir = os.path.join(temp_dir, contents[0])
-            
-            # Load from the directory
-            result = self.load_from_directory(temp_dir, image_load_cap, max_res, sort)
+                         max_res: int = 0, sort: str = "None", num_workers: int = 0) -> Tuple:
+        """
+        Load images straight from an archive file without extracting it to disk.
+        Sorting and image_load_cap are applied to the member list, so only the
+        selected members are ever read.
+        """
+        if archive_path.lower().endswith('.zip'):
+            archive = zipfile.ZipFile(archive_path, 'r')
+        elif archive_path.lower().endswith('.7z'):
+            archive = py7zr.SevenZipFile(archive_path, mode='r')
+        else:  # tar, tar.gz, tar.bz2
+            archive = tarfile.open(archive_path, 'r')
+        
+        with archive:
+            members = _select_archive_image_members(_list_archive_members(archive))
+            if not members:
+                raise ValueError(f"No valid image files found in archive {archive_path}")
+            archive_position = {name: i for i, (name, _) in enumerate(members)}
             
-            # Update file path to original archive
-            images, w, h, count, _, _, fps = result
-            file_name = os.path.basename(archive_path).rsplit('.', 1)[0]
+            # Archives only store a single timestamp per member
+            members = self.sort_and_cap(
+                members, sort, image_load_cap,
+                name_key=lambda m: m[0].lower(),
+                ctime_key=lambda m: m[1],
+                mtime_key=lambda m: m[1],
+            )
+            member_names = [name for name, _ in members]
             
-            return (images, w, h, count, file_name, archive_path, fps)
+            # Read in archive order: seeking backwards in a compressed tar (or 7z solid block)
+            # restarts decompression, so a random sort order would cost quadratic time
+            read_order = sorted(range(len(member_names)), key=lambda i: archive_position[member_names[i]])
+            frames_in_read_order = load_images_parallel(
+                _iter_archive_member_files(archive, [member_names[i] for i in read_order]), max_res, num_workers
+            )
+            frames = [None] * len(member_names)
+            for i, frame in zip(read_order, frames_in_read_order):
+                frames[i] = frame
+        
+        frames = [f for f in frames if f is not None]
+        if not frames:
+            raise ValueError(f"No valid images found in archive {archive_path}")
+        
+        images = concat_image_tensors(frames)
+        _, h, w, _ = images.shape
+        file_name = os.path.basename(archive_path).rsplit('.', 1)[0]
+        
+        return (images, w, h, len(frames), file_name, archive_path, 0.0)
+
+class VideoHandle:
+    """
+    Lazy, seekable view on a video file. Frames are only decoded when they are requested
+    and recently decoded frames are kept in a small LRU (bounded by total bytes), so nodes
+    that need a window of a long clip don't have to decode everything before it.
+    """
+
+    # Seeking re-decodes from the previous keyframe, reading forward is cheaper for small gaps
+    MAX_FORWARD_GAP = 32
+
+    def __init__(self, video_path: str, cache_bytes: int = 512 * 1024**2):
+        self.path = video_path
+        self.cache_bytes = cache_bytes
+        self._frames = OrderedDict()  # (frame_index, max_res) -> uint8 (H, W, C)
+        self._frames_nbytes = 0
+        self._lock = threading.Lock()
+        self._cap = None
+        self._next_index = 0  # index of the frame the capture will read next
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video file: {video_path}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+    def __repr__(self):
+        return f"VideoHandle({self.path}, {self.frame_count} frames, {self.width}x{self.height} @ {self.fps:.2f} fps)"
+
+    def _open(self):
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.path)
+            self._next_index = 0
+
+    def release(self):
+        """Close the capture and drop all cached frames."""
+        with self._lock:
+            if self._cap is not None:
+                self._cap.release()
+                self._cap = None
+            self._frames.clear()
+            self._frames_nbytes = 0
+
+    def _decode(self, index: int) -> Optional[np.ndarray]:
+        """Decode the frame at index, reading forward when it is close and seeking otherwise."""
+        self._open()
+        gap = index - self._next_index
+        if gap < 0 or gap > self.MAX_FORWARD_GAP:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            self._next_index = index
+        while self._next_index < index:
+            if not self._cap.grab():
+                return None
+            self._next_index += 1
+
+        ret = self._cap.grab()
+        self._next_index += 1
+        if not ret:
+            return None
+        ret, frame_cv = self._cap.retrieve()
+        return frame_cv if ret else None
+
+    def get_frames(self, indices: List[int], max_res: int = 0) -> np.ndarray:
+        """
+        Return the requested frames as a uint8 array (N, H, W, C), in the requested order.
+        Indices outside of the video are dropped.
+        """
+        indices = [i for i in indices if 0 <= i < self.frame_count]
+        decoded = {}
+
+        with self._lock:
+            missing = []
+            for i in dict.fromkeys(indices):
+                key = (i, max_res)
+                if key in self._frames:
+                    self._frames.move_to_end(key)
+                    decoded[i] = self._frames[key]
+                else:
+                    missing.append(i)
+
+            # Decode in stream order so neighbouring frames are read sequentially
+            for i in sorted(missing):
+                frame_cv = self._decode(i)
+                if frame_cv is None:
+                    logger.warning(f"Could not decode frame {i} of {self.path}")
+                    continue
+                frame = _cv_frame_to_np(frame_cv, max_res, as_float=False)
+                decoded[i] = frame
+                self._frames[(i, max_res)] = frame
+                self._frames_nbytes += frame.nbytes
+                while self._frames_nbytes > self.cache_bytes and self._frames:
+                    _, evicted = self._frames.popitem(last=False)
+                    self._frames_nbytes -= evicted.nbytes
+
+        frames = [decoded[i] for i in indices if i in decoded]
+        if not frames:
+            raise ValueError(f"None of the requested frames could be decoded from {self.path}")
+        return np.stack(frames, axis=0)
+
+MAX_VIDEO_HANDLES = 4
+_video_handles = OrderedDict()  # realpath -> (mtime, VideoHandle), least recently used first
+_video_handles_lock = threading.Lock()
+
+def get_video_handle(video_path: str) -> VideoHandle:
+    """
+    Return a shared VideoHandle for video_path, so its frame cache persists across node executions.
+    Only the MAX_VIDEO_HANDLES most recently used videos are kept open; handles of evicted or
+    modified videos are released.
+    """
+    real_path = os.path.realpath(video_path)
+    mtime = os.path.getmtime(real_path)
+    stale = []
+    with _video_handles_lock:
+        entry = _video_handles.get(real_path)
+        if entry is not None and entry[0] == mtime:
+            _video_handles.move_to_end(real_path)
+            return entry[1]
+        if entry is not None:
+            stale.append(entry[1])
+        handle = VideoHandle(video_path)
+        _video_handles[real_path] = (mtime, handle)
+        _video_handles.move_to_end(real_path)
+        while len(_video_handles) > MAX_VIDEO_HANDLES:
+            _, (_, evicted) = _video_handles.popitem(last=False)
+            stale.append(evicted)
+
+    for old_handle in stale:
+        old_handle.release()
+    return handle
+
+_FRAME_INDEX_TOKEN = re.compile(r"^(\d+)(?:\s*-\s*(\d+))?(?:\s*:\s*(\d+))?$")
+
+def parse_frame_indices(indices_str: str) -> List[int]:
+    """
+    Parse an index string like "0, 5, 10-20, 30-40:2" (ranges are inclusive, optional :step).
+    Indices are non-negative; malformed tokens raise a ValueError naming the token.
+    """
+    indices = []
+    for part in indices_str.replace(";", ",").split(","):
+        token = part.strip()
+        if not token:
+            continue
+        match = _FRAME_INDEX_TOKEN.match(token)
+        if match is None:
+            raise ValueError(f"Invalid frame index '{token}' in '{indices_str}': expected N, N-M or N-M:STEP with non-negative integers")
+        start, end, step = match.groups()
+        if end is None:
+            if step is not None:
+                raise ValueError(f"Invalid frame index '{token}' in '{indices_str}': a step needs a range (N-M:STEP)")
+            indices.append(int(start))
+            continue
+        if int(end) < int(start):
+            raise ValueError(f"Invalid frame range '{token}' in '{indices_str}': end is before start")
+        step = int(step) if step is not None else 1
+        if step < 1:
+            raise ValueError(f"Invalid frame range '{token}' in '{indices_str}': step must be at least 1")
+        indices.extend(range(int(start), int(end) + 1, step))
+    return indices
+
+class Eden_VideoHandleLoader:
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "path": ("STRING", {
+                    "tooltip": "Path to a video file (absolute, relative to the input directory, or [input]/[output] annotated)."
+                }),
+            }
+        }
+
+    RETURN_TYPES = ("VIDEO_HANDLE", "INT", "INT", "INT", "FLOAT")
+    RETURN_NAMES = ("video_handle", "WIDTH", "HEIGHT", "FRAME_COUNT", "FPS")
+    FUNCTION = "open_video"
+    CATEGORY = "Eden 🌱/general"
+    DESCRIPTION = "Opens a video without decoding it. Connect the handle to Load Video Frames to decode only the frames you need."
+
+    def open_video(self, path: str):
+        resolved_path = load_path(path)
+        if isinstance(resolved_path, list) or os.path.isdir(resolved_path):
+            raise ValueError(f"Expected a single video file, got: {path}")
+
+        handle = get_video_handle(resolved_path)
+        return (handle, handle.width, handle.height, handle.frame_count, handle.fps)
+
+class Eden_VideoFrameRangeLoader:
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "video_handle": ("VIDEO_HANDLE",),
+                "start_frame": ("INT", {"default": 0, "min": 0, "max": sys.maxsize, "step": 1}),
+                "end_frame": ("INT", {
+                    "default": -1, "min": -1, "max": sys.maxsize, "step": 1,
+                    "tooltip": "Last frame to load (inclusive). -1 means until the end of the video."
+                }),
+                "step": ("INT", {"default": 1, "min": 1, "max": 10000, "step": 1}),
+                "max_res": ("INT", {
+                    "default": 2048, "min": 0, "max": sys.maxsize, "step": 1,
+                    "tooltip": "Maximum resolution (width or height). 0 means no resize."
+                }),
+            },
+            "optional": {
+                "indices": ("STRING", {
+                    "default": "",
+                    "tooltip": "Explicit frame indices, e.g. '0, 10, 500-560, 600-700:5'. Overrides start/end/step when set."
+                }),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "INT", "FLOAT")
+    RETURN_NAMES = ("image", "COUNT", "FPS")
+    FUNCTION = "load_frames"
+    CATEGORY = "Eden 🌱/general"
+    DESCRIPTION = "Decodes only the requested frames from a video handle (recently decoded frames are cached per handle)."
+
+    def load_frames(self, video_handle: VideoHandle, start_frame: int, end_frame: int,
+                    step: int, max_res: int, indices: str = ""):
+        if indices.strip():
+            frame_indices = parse_frame_indices(indices)
+        else:
+            last_frame = video_handle.frame_count - 1 if end_frame < 0 else min(end_frame, video_handle.frame_count - 1)
+            frame_indices = list(range(start_frame, last_frame + 1, step))
+
+        if not frame_indices:
+            raise ValueError(f"No frames selected from {video_handle.path}")
+
+        frames = video_handle.get_frames(frame_indices, max_res)
+        images = torch.from_numpy(frames).float().div_(255.0)
+        fps = video_handle.fps / step if not indices.strip() else video_handle.fps
+
+        return (images, images.shape[0], fps)
 
 class Eden_Save_Param_Dict:
     """Node that collects various inputs, assigns keys to them, and saves them as a JSON file"""
@@ -0,0 +1,189 @@
+"""
+Shared, incrementally refreshed index of folder contents.
+
+Folder scanning nodes used to call os.listdir / os.walk / glob (and sometimes open every
+file to validate it) on every execution, which is slow on network mounts with many files.
+This module keeps one process-wide index of scanned folders with the stat info of every
+file and cached per-file validation results.
+
+A folder is only re-listed when its own mtime changes (files were added, removed or
+renamed). File entries whose size and mtime are unchanged keep their validation results.
+Rewriting a file in place does not change the folder mtime, so cached validation results
+are also re-checked against the file's own size and mtime before they are used.
+"""
+
+import os
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Directory mtimes have a coarse resolution on some filesystems (e.g. 1-2s on NFS/FAT).
+# Listings taken within this window of the last directory change are re-checked next time.
+MTIME_GRANULARITY_S = 2.0
+
+
+class FileEntry:
+    __slots__ = ("name", "size", "mtime", "ctime", "mtime_ns", "validation")
+
+    def __init__(self, name: str, st: os.stat_result):
+        self.name = name
+        self.validation = {}  # validator name -> cached result
+        self.update(st)
+
+    def update(self, st: os.stat_result):
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.ctime = st.st_ctime
+        self.mtime_ns = st.st_mtime_ns
+
+    def same_file(self, st: os.stat_result) -> bool:
+        return self.size == st.st_size and self.mtime_ns == st.st_mtime_ns
+
+
+class _DirState:
+    __slots__ = ("mtime_ns", "trusted", "names", "files", "subdirs")
+
+    def __init__(self, mtime_ns: int, trusted: bool, names: List[str],
+                 files: Dict[str, FileEntry], subdirs: List[str]):
+        self.mtime_ns = mtime_ns
+        self.trusted = trusted
+        self.names = names        # every entry name, in os.scandir order
+        self.files = files        # regular files (symlinks followed), in os.scandir order
+        self.subdirs = subdirs    # sub directory names that os.walk would descend into
+
+
+class DirectoryIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._dirs: Dict[str, _DirState] = {}
+
+    def _refresh(self, folder: str) -> _DirState:
+        """Return the up to date state of folder, re-listing it only when it changed."""
+        key = os.path.realpath(folder)
+        dir_mtime_ns = os.stat(key).st_mtime_ns
+
+        state = self._dirs.get(key)
+        if state is not None and state.trusted and state.mtime_ns == dir_mtime_ns:
+            return state
+
+        old_files = state.files if state is not None else {}
+        names, files, subdirs = [], {}, []
+        with os.scandir(key) as it:
+            for dir_entry in it:
+                names.append(dir_entry.name)
+                try:
+                    if dir_entry.is_dir():
+                        if not dir_entry.is_symlink():
+                            subdirs.append(dir_entry.name)
+                        continue
+                    if not dir_entry.is_file():
+                        continue
+                    st = dir_entry.stat()
+                except OSError:
+                    continue
+                old_entry = old_files.get(dir_entry.name)
+                if old_entry is not None and old_entry.same_file(st):
+                    files[dir_entry.name] = old_entry
+                else:
+                    files[dir_entry.name] = FileEntry(dir_entry.name, st)
+
+        trusted = (time.time() - dir_mtime_ns / 1e9) > MTIME_GRANULARITY_S
+        state = _DirState(dir_mtime_ns, trusted, names, files, subdirs)
+        self._dirs[key] = state
+        return state
+
+    def version(self, folder: str) -> int:
+        """An integer that changes whenever the listing of folder changes."""
+        with self._lock:
+            return self._refresh(folder).mtime_ns
+
+    def list_names(self, folder: str) -> List[str]:
+        """All entry names in folder (like os.listdir)."""
+        with self._lock:
+            return list(self._refresh(folder).names)
+
+    def list_files(self, folder: str, recursive: bool = False,
+                   extensions: Optional[List[str]] = None,
+                   case_sensitive_extensions: bool = True) -> List[Tuple[str, FileEntry]]:
+        """
+        List (path, FileEntry) for the regular files in folder. Paths are joined onto folder
+        as given (like os.path.join(folder, name)); recursive listing follows os.walk order.
+        """
+        if extensions is not None:
+            exts = tuple(extensions) if case_sensitive_extensions else tuple(e.lower() for e in extensions)
+
+        result = []
+        with self._lock:
+            pending = [folder]
+            while pending:
+                current = pending.pop(0)
+                try:
+                    state = self._refresh(current)
+                except OSError:
+                    continue
+                for name, entry in state.files.items():
+                    if extensions is not None:
+                        compare_name = name if case_sensitive_extensions else name.lower()
+                        if not compare_name.endswith(exts):
+                            continue
+                    result.append((os.path.join(current, name), entry))
+                if recursive:
+                    # Depth first, like os.walk(topdown=True)
+                    pending[0:0] = [os.path.join(current, d) for d in state.subdirs]
+        return result
+
+    def _revalidate(self, path: str, entry: FileEntry):
+        """Drop the cached validation results of entry if the file was rewritten in place (call under the lock)."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if not entry.same_file(st):
+            entry.update(st)
+            entry.validation.clear()
+
+    def cached(self, path: str, entry: FileEntry, validator_name: str, default=None):
+        """The cached validation result for the current version of the file, or default."""
+        with self._lock:
+            self._revalidate(path, entry)
+            return entry.validation.get(validator_name, default)
+
+    def check(self, path: str, entry: FileEntry, validator_name: str,
+              validator: Callable[[str], bool]) -> bool:
+        """Run validator(path) once per file version and cache the result on the entry."""
+        with self._lock:
+            self._revalidate(path, entry)
+            result = entry.validation.get(validator_name)
+            if result is not None:
+                return result
+            mtime_ns = entry.mtime_ns
+
+        # Validators read the file, don't hold the lock while they run
+        result = bool(validator(path))
+        with self._lock:
+            if entry.mtime_ns == mtime_ns:
+                entry.validation[validator_name] = result
+        return result
+
+    def mark(self, path: str, validator_name: str, result: bool):
+        """Record a validation result for path (e.g. a file that failed to decode when it was used)."""
+        with self._lock:
+            state = self._dirs.get(os.path.realpath(os.path.dirname(path) or "."))
+            entry = state.files.get(os.path.basename(path)) if state is not None else None
+            if entry is not None:
+                self._revalidate(path, entry)
+                entry.validation[validator_name] = bool(result)
+
+    def invalidate(self, folder: Optional[str] = None):
+        with self._lock:
+            if folder is None:
+                self._dirs.clear()
+            else:
+                self._dirs.pop(os.path.realpath(folder), None)
+
+
+_index = DirectoryIndex()
+
+def get_directory_index() -> DirectoryIndex:
+    """Return the process-wide directory index shared by all folder scanning nodes."""
+    return _index
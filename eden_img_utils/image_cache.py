@@ -0,0 +1,240 @@
+"""
+Persistent on-disk cache of decoded (and already resized) uint8 images, plus the
+shared decode helper used by the image loading nodes.
+
+Folder loading nodes re-decode the same reference images on every queue run.
+This cache stores each decoded image as a .npy file that is memory-mapped on
+reload, so a warm load costs about as much as reading the raw pixels from disk.
+Only bounded-size decodes are stored: writing an uncompressed full resolution photo
+(~72 MB for 6000x4000) costs more than decoding the JPEG again.
+
+Entries are keyed on (realpath, file size, file mtime, max_res, exif transpose),
+so any change to the source file produces a new key and the stale entry is dropped.
+The total size of the cache is bounded and the least recently used entries are evicted.
+
+The cache is opt-in. Configuration (environment variables):
+    EDEN_IMAGE_CACHE_DIR:             cache location (default: ~/.cache/eden_comfy_pipelines/decoded_images)
+    EDEN_IMAGE_CACHE_MAX_BYTES:       max total size in bytes (default: 0, the cache is disabled)
+    EDEN_IMAGE_CACHE_MAX_ENTRY_BYTES: images larger than this once decoded are not cached (default: 16 MB)
+"""
+
+import os
+import math
+import time
+import hashlib
+import logging
+import threading
+import numpy as np
+from typing import BinaryIO, Optional, Union
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "eden_comfy_pipelines", "decoded_images")
+DEFAULT_MAX_BYTES = 0
+DEFAULT_MAX_ENTRY_BYTES = 16 * 1024**2
+
+
+def resize_image_max_size(image: Image.Image, max_res: int) -> Image.Image:
+    """Resize image if its width or height exceeds max_res, preserving aspect ratio."""
+    if max_res <= 0:
+        return image
+    
+    w, h = image.size
+    if w <= max_res and h <= max_res:
+        return image
+    
+    # Calculate new dimensions preserving aspect ratio
+    if w > h:
+        new_w = max_res
+        new_h = int(h * (max_res / w))
+    else:
+        new_h = max_res
+        new_w = int(w * (max_res / h))
+    
+    # Resize using Lanczos resampling for quality
+    return image.resize((new_w, new_h), Image.Resampling.LANCZOS)
+
+def draft_for_max_res(image: Image.Image, max_res: int) -> Image.Image:
+    """
+    For a JPEG that has not been decoded yet, let the decoder downscale by 1/2, 1/4 or 1/8
+    in the DCT domain. The largest reduction that keeps both sides at or above the size
+    resize_image_max_size will resize to is picked, so the final resize still only shrinks.
+    """
+    if max_res <= 0 or image.format != 'JPEG':
+        return image
+
+    w, h = image.size
+    if w <= max_res and h <= max_res:
+        return image
+
+    scale = max_res / max(w, h)
+    image.draft(image.mode, (math.ceil(w * scale), math.ceil(h * scale)))
+    return image
+
+def decode_image_uint8(image_path: Union[str, BinaryIO], max_res: int = 0,
+                       reduced_decode: bool = True) -> np.ndarray:
+    """Decode, EXIF-transpose and (optionally) resize an image to an RGB uint8 array (H, W, C)."""
+    img = Image.open(image_path)
+    if reduced_decode:
+        img = draft_for_max_res(img, max_res)
+    try:
+        img = ImageOps.exif_transpose(img)
+    except Exception as e:
+        logger.warning(f"Error during EXIF transpose for {getattr(image_path, 'name', image_path)}: {e}")
+
+    if max_res > 0:
+        img = resize_image_max_size(img, max_res)
+
+    if img.mode == 'I':
+        img = img.point(lambda i: i * (1 / 255))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return np.array(img)
+
+
+class DecodedImageCache:
+    def __init__(self, cache_dir: str, max_bytes: int, max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = None      # key -> [n_bytes, last_used], filled lazily from disk
+        self._total_bytes = 0
+        self._path_keys = {}      # (realpath, variant) -> key, used to drop stale entries
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".npy")
+
+    def _scan(self):
+        """Rebuild the in-memory index from the files on disk (called once, under the lock)."""
+        self._entries = {}
+        self._total_bytes = 0
+        if not os.path.isdir(self.cache_dir):
+            return
+        for root, _, files in os.walk(self.cache_dir):
+            for f in files:
+                if not f.endswith(".npy"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, f))
+                except OSError:
+                    continue
+                self._entries[f[:-4]] = [st.st_size, st.st_mtime]
+                self._total_bytes += st.st_size
+
+    def _remove(self, key):
+        n_bytes, _ = self._entries.pop(key, (0, 0))
+        self._total_bytes -= n_bytes
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda kv: kv[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+
+    @staticmethod
+    def make_key(real_path, st, max_res, exif_transpose, variant=""):
+        key_str = f"{CACHE_FORMAT_VERSION}|{real_path}|{st.st_size}|{st.st_mtime_ns}|{max_res}|{int(exif_transpose)}|{variant}"
+        return hashlib.sha1(key_str.encode("utf-8")).hexdigest()
+
+    def load(self, path: str, max_res: int, decode_fn, exif_transpose: bool = True, variant: str = "",
+             max_entry_bytes: Optional[int] = None) -> np.ndarray:
+        """
+        Return the decoded uint8 (H, W, C) image for path, decoding it with decode_fn(path)
+        and storing the result on a miss. Hits are returned as read-only memory maps.
+
+        variant distinguishes callers that decode the same file differently.
+        Decoded images larger than max_entry_bytes (default: the cache wide limit) are returned
+        without being stored. Callers that always decode at full resolution pass a larger limit.
+        """
+        if not self.enabled:
+            return decode_fn(path)
+
+        real_path = os.path.realpath(path)
+        st = os.stat(real_path)
+        key = self.make_key(real_path, st, max_res, exif_transpose, variant)
+        entry_path = self._entry_path(key)
+
+        with self._lock:
+            if self._entries is None:
+                self._scan()
+            # The source file changed since it was cached: drop the old entry right away
+            old_key = self._path_keys.get((real_path, variant))
+            if old_key is not None and old_key != key:
+                self._remove(old_key)
+            self._path_keys[(real_path, variant)] = key
+            cached = key in self._entries
+
+        if cached:
+            try:
+                image = np.load(entry_path, mmap_mode="r")
+                # Touch the file so the LRU order also survives restarts
+                os.utime(entry_path)
+                with self._lock:
+                    if key in self._entries:
+                        self._entries[key][1] = time.time()
+                    self.hits += 1
+                return image
+            except (OSError, ValueError):
+                with self._lock:
+                    self._remove(key)
+
+        image = np.ascontiguousarray(decode_fn(path), dtype=np.uint8)
+
+        with self._lock:
+            self.misses += 1
+        if image.nbytes > (self.max_entry_bytes if max_entry_bytes is None else max_entry_bytes):
+            return image
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, image)
+            os.replace(tmp_path, entry_path)
+            n_bytes = os.path.getsize(entry_path)
+            with self._lock:
+                if key in self._entries:
+                    self._total_bytes -= self._entries[key][0]
+                self._entries[key] = [n_bytes, time.time()]
+                self._total_bytes += n_bytes
+                self._evict()
+        except OSError as e:
+            logger.warning(f"Could not write decoded image cache entry for {path}: {e}")
+
+        return image
+
+    def stats(self):
+        with self._lock:
+            n_entries = len(self._entries) if self._entries is not None else 0
+            return {"hits": self.hits, "misses": self.misses,
+                    "entries": n_entries, "total_bytes": self._total_bytes}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_decoded_image_cache() -> DecodedImageCache:
+    """Return the process-wide decoded image cache shared by all image loading nodes."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            cache_dir = os.environ.get("EDEN_IMAGE_CACHE_DIR", DEFAULT_CACHE_DIR)
+            max_bytes = int(os.environ.get("EDEN_IMAGE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+            max_entry_bytes = int(os.environ.get("EDEN_IMAGE_CACHE_MAX_ENTRY_BYTES", DEFAULT_MAX_ENTRY_BYTES))
+            _cache = DecodedImageCache(cache_dir, max_bytes, max_entry_bytes)
+        return _cache
@@ -4,7 +4,6 @@ import numpy as np
 import random
 import gc
 import torch
-import imghdr
 
 from PIL import Image, ImageOps, ImageSequence
 import torch.nn.functional as F
@@ -430,6 +429,10 @@ import hashlib
 from functools import lru_cache
 from contextlib import nullcontext
 from .img_utils import lab_to_rgb, rgb_to_lab
+from .image_cache import get_decoded_image_cache, decode_image_uint8
+from .directory_index import get_directory_index
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from PIL.PngImagePlugin import PngInfo
 
 # ============================================================
@@ -601,7 +604,7 @@ class MaskFromRGB_KMeans:
         image = image.to(device)
 
         # convert to LAB, keep channels-first
-        lab_images = torch.stack([rgb_to_lab(img) for img in image])  # (N,H,W,3)
+        lab_images = rgb_to_lab(image)  # (N,H,W,3), whole batch on device
         lab_images = lab_images.permute(0,3,1,2)                      # (N,3,H,W)
 
         # resize to clustering_resolution
@@ -1426,6 +1429,62 @@ def get_centre_crop(img, aspect_ratio):
         crop = img[top:bottom, :]
     return crop
 
+IMAGE_SIGNATURES = (
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"\xff\xd8\xff",         # JPEG
+    b"BM",                   # BMP
+    b"GIF87a", b"GIF89a",    # GIF
+    b"II*\x00", b"MM\x00*",  # TIFF
+)
+
+def has_image_signature(image_path):
+    """
+    Cheap listing-time check: only reads the first bytes of the file and compares them to
+    known image magic numbers. Files that pass are fully validated when they are loaded.
+    """
+    try:
+        with open(image_path, "rb") as f:
+            header = f.read(12)
+    except OSError:
+        return False
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return True
+    if header.startswith(IMAGE_SIGNATURES):
+        return True
+    print(f"Skipping invalid image: {image_path} - unrecognized file header")
+    return False
+
+def list_valid_images(folder, img_extensions):
+    """
+    List the image files in folder through the shared directory index: the extension and
+    file signature are checked (and cached) here, decoding problems are caught on load.
+    """
+    index = get_directory_index()
+    entries = index.list_files(folder, extensions=img_extensions)
+    return [path for path, entry in entries
+            if index.cached(path, entry, "decodable", True)
+            and index.check(path, entry, "image_signature", has_image_signature)]
+
+def mark_invalid_image(image_path, error):
+    """Exclude an image that failed to decode from future listings (until the file changes)."""
+    print(f"Skipping invalid image: {image_path} - {str(error)}")
+    get_directory_index().mark(image_path, "decodable", False)
+
+# The folder nodes always decode at full resolution, so they allow larger cache entries than the
+# cache wide default (128 MB is an RGB image of ~44 MP, e.g. 8192x5464)
+FOLDER_NODE_MAX_ENTRY_BYTES = 128 * 1024**2
+DECODED_CACHE_TOOLTIP = ("Decoded images are reused across runs when the on-disk cache is enabled "
+                         "(EDEN_IMAGE_CACHE_MAX_BYTES > 0, off by default). Images above ~44 MP are never cached.")
+
+def load_image_uint8(image_path):
+    """Load an image as a uint8 (H, W, C) array, going through the persistent decoded image cache."""
+    return get_decoded_image_cache().load(image_path, 0, decode_image_uint8, exif_transpose=True, variant="img_nodes",
+                                          max_entry_bytes=FOLDER_NODE_MAX_ENTRY_BYTES)
+
+def load_image_float(image_path):
+    """Load an image as a float32 (H, W, C) array in 0-1, going through the persistent decoded image cache."""
+    return load_image_uint8(image_path).astype(np.float32) / 255.0
+
 def get_uniformly_sized_crops(imgs, target_n_pixels=2048**2):
     """
     Given a list of images:
@@ -1463,7 +1522,7 @@ class LoadRandomImage:
     def INPUT_TYPES(s):
         return {
             "required": {
-                    "folder": ("STRING", {"default": "."}),
+                    "folder": ("STRING", {"default": ".", "tooltip": DECODED_CACHE_TOOLTIP}),
                     "n_images": ("INT", {"default": 1, "min": -1, "max": 100}),
                     "seed": ("INT", {"default": 0, "min": 0, "max": 100000}),
                     "sort": ("BOOLEAN", {"default": False}),
@@ -1477,55 +1536,42 @@ class LoadRandomImage:
     FUNCTION = "load"
 
     def load(self, folder, n_images, seed, sort, loop_sequence):
-        image_paths = [os.path.join(folder, f) for f in os.listdir(folder)]
-        image_paths = [f for f in image_paths if os.path.isfile(f)]
-        # Filter using file extensions
-        image_paths = [f for f in image_paths if any([f.endswith(ext) for ext in self.img_extensions])]
-        valid_image_paths = []
-        
-        for f in image_paths:
-            if imghdr.what(f):
-                valid_image_paths.append(f)
-            else:
-                try:
-                    img = Image.open(f)
-                    img.verify()  # Ensure it's a valid image
-                    valid_image_paths.append(f)
-                except Exception as e:
-                    print(f"Skipping invalid image: {f} - {str(e)}")
+        valid_image_paths = list_valid_images(folder, self.img_extensions)
+
+        if not valid_image_paths:
+            raise ValueError(f"No valid images found in folder: {folder}")
 
+        # Candidates in order of preference: if a chosen image turns out to be corrupt,
+        # the next candidate is used instead.
         # Special case: sort=True and n_images=1 → use seed as index
         if sort and n_images == 1:
             valid_image_paths = sorted(valid_image_paths)
-            if valid_image_paths:
-                idx = seed % len(valid_image_paths)
-                valid_image_paths = [valid_image_paths[idx]]
-            else:
-                raise ValueError(f"No valid images found in folder: {folder}")
+            idx = seed % len(valid_image_paths)
+            candidates = valid_image_paths[idx:] + valid_image_paths[:idx]
+            n_wanted = 1
         else:
             random.seed(seed)
             random.shuffle(valid_image_paths)
-            if n_images > 0:
-                valid_image_paths = valid_image_paths[:n_images]
-            if sort:
-                valid_image_paths = sorted(valid_image_paths)
+            candidates = valid_image_paths
+            n_wanted = n_images if n_images > 0 else len(candidates)
 
-        if not valid_image_paths:
-            raise ValueError(f"No valid images found in folder: {folder}")
-            
-        imgs, paths, filenames = [], [], []
-        for image_path in valid_image_paths:
+        loaded = []
+        for image_path in candidates:
+            if len(loaded) >= n_wanted:
+                break
             try:
-                img = Image.open(image_path)
-                img = ImageOps.exif_transpose(img)
+                loaded.append((image_path, load_image_float(image_path)))
             except Exception as e:
-                print(f"Error during EXIF transpose for {image_path}: {str(e)}")
+                mark_invalid_image(image_path, e)
 
-            if img.mode == 'I':
-                img = img.point(lambda i: i * (1 / 255))
+        if not loaded:
+            raise ValueError(f"No valid images found in folder: {folder}")
 
-            image = img.convert("RGB")
-            image = np.array(image).astype(np.float32) / 255.0
+        if sort:
+            loaded = sorted(loaded, key=lambda x: x[0])
+
+        imgs, paths, filenames = [], [], []
+        for image_path, image in loaded:
             imgs.append(image)
             paths.append(image_path)
             filenames.append(os.path.basename(image_path))
@@ -1545,6 +1591,64 @@ class LoadRandomImage:
         return (output_image, paths, filenames, str(filenames[0]))
 
 
+class ImagePrefetcher:
+    """
+    Decodes upcoming images of a folder walk in background threads.
+    Entries are keyed on (path, mtime) so a file that changes after it was prefetched is reloaded.
+    Prefetched images are kept as uint8 and only converted to float when they are taken.
+    """
+    def __init__(self, num_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=num_workers)
+        self.folder_state = None
+        self.futures = {}  # (path, mtime) -> Future
+
+    def reset(self):
+        for future in self.futures.values():
+            future.cancel()
+        self.futures = {}
+
+    def shutdown(self):
+        self.reset()
+        self.executor.shutdown(wait=False)
+
+    def get(self, image_path, folder_state, upcoming_paths):
+        """Return the decoded image for image_path and schedule decoding of upcoming_paths."""
+        if folder_state != self.folder_state:
+            # Folder contents changed: everything that was prefetched may be stale
+            self.reset()
+            self.folder_state = folder_state
+
+        key = (image_path, os.path.getmtime(image_path))
+        future = self.futures.pop(key, None)
+        image = future.result() if future is not None else load_image_uint8(image_path)
+
+        wanted = set()
+        for path in upcoming_paths:
+            try:
+                wanted_key = (path, os.path.getmtime(path))
+            except OSError:
+                continue
+            wanted.add(wanted_key)
+            if wanted_key not in self.futures:
+                self.futures[wanted_key] = self.executor.submit(load_image_uint8, path)
+
+        for stale_key in [k for k in self.futures if k not in wanted]:
+            self.futures.pop(stale_key).cancel()
+
+        return image.astype(np.float32) / 255.0
+
+MAX_IMAGE_PREFETCHERS = 2
+_image_prefetchers = OrderedDict()  # folder -> ImagePrefetcher, least recently used first
+
+def get_image_prefetcher(folder):
+    """Return the prefetcher for folder. Only the most recently used folders keep one, evicted ones are shut down."""
+    prefetcher = _image_prefetchers.pop(folder, None) or ImagePrefetcher()
+    _image_prefetchers[folder] = prefetcher
+    while len(_image_prefetchers) > MAX_IMAGE_PREFETCHERS:
+        _, evicted = _image_prefetchers.popitem(last=False)
+        evicted.shutdown()
+    return prefetcher
+
 class ImageFolderIterator:
     def __init__(self):
         self.img_extensions = [".png", ".jpg", ".jpeg", ".bmp", ".webp", ".JPEG", ".JPG"]
@@ -1553,9 +1657,13 @@ class ImageFolderIterator:
     def INPUT_TYPES(s):
         return {
             "required": {
-                "folder": ("STRING", {"default": "."}),
+                "folder": ("STRING", {"default": ".", "tooltip": DECODED_CACHE_TOOLTIP}),
                 "index": ("INT", {"default": 0, "min": 0, "max": 99999}),
                 "sort": ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                "prefetch_count": ("INT", {"default": 0, "min": 0, "max": 8,
+                    "tooltip": "Decode the next N images (index+1..index+N) in the background for sequential batch runs. 0 disables prefetching."}),
             }
         }
     
@@ -1565,24 +1673,8 @@ class ImageFolderIterator:
     FUNCTION = "load_image"
     
     def get_image_paths(self, folder, sort):
-        # List all files in the folder
-        image_paths = [os.path.join(folder, f) for f in os.listdir(folder)]
-        image_paths = [f for f in image_paths if os.path.isfile(f)]
-        # Filter using file extensions
-        image_paths = [f for f in image_paths if any([f.endswith(ext) for ext in self.img_extensions])]
-        valid_image_paths = []
-        
-        # Validate images
-        for f in image_paths:
-            if imghdr.what(f):
-                valid_image_paths.append(f)
-            else:
-                try:
-                    img = Image.open(f)
-                    img.verify()
-                    valid_image_paths.append(f)
-                except Exception as e:
-                    print(f"Skipping invalid image: {f} - {str(e)}")
+        # Listing and validation results come from the shared directory index
+        valid_image_paths = list_valid_images(folder, self.img_extensions)
         
         # Sort if requested
         if sort:
@@ -1590,26 +1682,35 @@ class ImageFolderIterator:
             
         return valid_image_paths
     
-    def load_image(self, folder, index, sort):
+    def load_image(self, folder, index, sort, prefetch_count=0):
         valid_image_paths = self.get_image_paths(folder, sort)
         
         if not valid_image_paths:
             raise ValueError(f"No valid images found in folder: {folder}")
         
-        # Wrap around if index exceeds number of images
-        actual_index = index % len(valid_image_paths)
-        image_path = valid_image_paths[actual_index]
-        
-        try:
-            # Load and process image
-            img = Image.open(image_path)
-            img = ImageOps.exif_transpose(img)  # Correct orientation based on EXIF
+        # A corrupt image is dropped from the listing and the next one takes its index
+        for _ in range(len(valid_image_paths)):
+            # Wrap around if index exceeds number of images
+            actual_index = index % len(valid_image_paths)
+            image_path = valid_image_paths[actual_index]
             
-            if img.mode == 'I':
-                img = img.point(lambda i: i * (1 / 255))
-            
-            image = img.convert("RGB")
-            image = np.array(image).astype(np.float32) / 255.0
+            try:
+                # Load and process image (EXIF orientation corrected, cached across runs)
+                if prefetch_count > 0:
+                    n_paths = len(valid_image_paths)
+                    upcoming_paths = [valid_image_paths[(actual_index + i) % n_paths]
+                                      for i in range(1, min(prefetch_count, n_paths - 1) + 1)]
+                    folder_state = (folder, sort, get_directory_index().version(folder))
+                    prefetcher = get_image_prefetcher(folder)
+                    image = prefetcher.get(image_path, folder_state, upcoming_paths)
+                else:
+                    image = load_image_float(image_path)
+            except Exception as e:
+                mark_invalid_image(image_path, e)
+                valid_image_paths = self.get_image_paths(folder, sort)
+                if not valid_image_paths:
+                    break
+                continue
             
             # Add batch dimension
             output_image = torch.from_numpy(image)[None,]
@@ -1618,9 +1719,8 @@ class ImageFolderIterator:
             filename = os.path.splitext(os.path.basename(image_path))[0]
             
             return (output_image, filename)
-            
-        except Exception as e:
-            raise RuntimeError(f"Error processing image {image_path}: {str(e)}")
+        
+        raise RuntimeError(f"No image in folder {folder} could be decoded")
         
 
 class LoadImagesByFilename:
@@ -1699,8 +1799,7 @@ class GetRandomFile:
     FUNCTION = "get_path"
 
     def get_path(self, folder, seed):
-        files = [os.path.join(folder, f) for f in os.listdir(folder)]
-        files = [f for f in files if os.path.isfile(f)]
+        files = [path for path, _ in get_directory_index().list_files(folder)]
 
         random.seed(seed)
         path = random.choice(files)
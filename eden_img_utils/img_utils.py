@@ -1,6 +1,7 @@
 import cv2
 import torch
 import numpy as np
+from functools import lru_cache
 from PIL import Image
 
 def preprocess_lab(lab):
@@ -17,109 +18,84 @@ def deprocess_lab(L_chan, a_chan, b_chan):
     return torch.stack([(L_chan + 1) / 2.0 * 100.0, a_chan * 110.0, b_chan * 110.0], dim=2)
 
 
-def rgb_to_lab(srgb):
-    # Get appropriate device
-    if torch.cuda.is_available():
-        device = torch.device('cuda')
-    elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-        device = torch.device('mps')
-    else:
-        device = torch.device('cpu')
-    
-    srgb_pixels = torch.reshape(srgb, [-1, 3])
-    
-    # Convert to correct device
-    srgb_pixels = srgb_pixels.to(device)
-
-    linear_mask = (srgb_pixels <= 0.04045).type(torch.FloatTensor).to(device)
-    exponential_mask = (srgb_pixels > 0.04045).type(torch.FloatTensor).to(device)
-    rgb_pixels = (srgb_pixels / 12.92 * linear_mask) + (((srgb_pixels + 0.055) / 1.055) ** 2.4) * exponential_mask
-    
-    rgb_to_xyz = torch.tensor([
-                #    X        Y          Z
-                [0.412453, 0.212671, 0.019334], # R
-                [0.357580, 0.715160, 0.119193], # G
-                [0.180423, 0.072169, 0.950227], # B
-            ]).type(torch.FloatTensor).to(device)
-    
-    xyz_pixels = torch.mm(rgb_pixels, rgb_to_xyz)
-    
+# sRGB <-> CIE LAB (D65 white point), using the same formulas as OpenCV's float RGB2Lab / Lab2RGB.
+# Both directions work on [..., 3] tensors with any number of batch dims and stay on the input's device.
+_LAB_EPSILON = 6.0/29.0
+
+@lru_cache(maxsize=16)
+def _lab_constants(device, dtype):
+    """Conversion matrices, built once per (device, dtype)."""
+    def _t(values):
+        return torch.tensor(values, device=device, dtype=dtype)
+    return {
+        "rgb_to_xyz": _t([
+            #    X        Y          Z
+            [0.412453, 0.212671, 0.019334], # R
+            [0.357580, 0.715160, 0.119193], # G
+            [0.180423, 0.072169, 0.950227], # B
+        ]),
+        "xyz_to_rgb": _t([
+            #     r           g          b
+            [ 3.2404542, -0.9692660,  0.0556434], # x
+            [-1.5371385,  1.8760108, -0.2040259], # y
+            [-0.4985314,  0.0415560,  1.0572252], # z
+        ]),
+        "white_point": _t([0.950456, 1.0, 1.088754]),
+        "fxfyfz_to_lab": _t([
+            #  l       a       b
+            [  0.0,  500.0,    0.0], # fx
+            [116.0, -500.0,  200.0], # fy
+            [  0.0,    0.0, -200.0], # fz
+        ]),
+        "lab_to_fxfyfz": _t([
+            #   fx      fy        fz
+            [1/116.0, 1/116.0,  1/116.0], # l
+            [1/500.0,     0.0,      0.0], # a
+            [    0.0,     0.0, -1/200.0], # b
+        ]),
+        "lab_offset": _t([16.0, 0.0, 0.0]),
+    }
+
+
+def rgb_to_lab(srgb, dtype=None):
+    """
+    Convert sRGB (0-1) [..., 3] to LAB [..., 3] with L in [0, 100] and a/b roughly in [-110, 110].
+    Computes in dtype (default: float32, or the input dtype if it already is a float type);
+    torch.float16 halves memory and bandwidth on CUDA.
+    """
+    if dtype is None:
+        dtype = srgb.dtype if srgb.is_floating_point() else torch.float32
+    c = _lab_constants(srgb.device, dtype)
+    srgb = srgb.to(dtype)
+
+    rgb = torch.where(srgb <= 0.04045, srgb / 12.92, ((srgb.clamp(min=0) + 0.055) / 1.055) ** 2.4)
+    xyz = torch.matmul(rgb, c["rgb_to_xyz"]) / c["white_point"]
+
     # XYZ to Lab
-    xyz_normalized_pixels = torch.mul(xyz_pixels, torch.tensor([1/0.950456, 1.0, 1/1.088754]).type(torch.FloatTensor).to(device))
-
-    epsilon = 6.0/29.0
-
-    linear_mask = (xyz_normalized_pixels <= (epsilon**3)).type(torch.FloatTensor).to(device)
-    exponential_mask = (xyz_normalized_pixels > (epsilon**3)).type(torch.FloatTensor).to(device)
-
-    fxfyfz_pixels = (xyz_normalized_pixels / (3 * epsilon**2) + 4.0/29.0) * linear_mask + ((xyz_normalized_pixels+0.000001) ** (1.0/3.0)) * exponential_mask
-    
-    # Convert to lab
-    fxfyfz_to_lab = torch.tensor([
-        #  l       a       b
-        [  0.0,  500.0,    0.0], # fx
-        [116.0, -500.0,  200.0], # fy
-        [  0.0,    0.0, -200.0], # fz
-    ]).type(torch.FloatTensor).to(device)
-    
-    lab_pixels = torch.mm(fxfyfz_pixels, fxfyfz_to_lab) + torch.tensor([-16.0, 0.0, 0.0]).type(torch.FloatTensor).to(device)
-    
-    return torch.reshape(lab_pixels, srgb.shape)
-
-
-def lab_to_rgb(lab):
-    # Get appropriate device
-    if torch.cuda.is_available():
-        device = torch.device('cuda')
-    elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-        device = torch.device('mps')
-    else:
-        device = torch.device('cpu')
-        
-    lab_pixels = torch.reshape(lab, [-1, 3])
-    
-    # Convert to device
-    lab_pixels = lab_pixels.to(device)
-    
-    # Convert to fxfyfz
-    lab_to_fxfyfz = torch.tensor([
-        #   fx      fy        fz
-        [1/116.0, 1/116.0,  1/116.0], # l
-        [1/500.0,     0.0,      0.0], # a
-        [    0.0,     0.0, -1/200.0], # b
-    ]).type(torch.FloatTensor).to(device)
-    
-    fxfyfz_pixels = torch.mm(lab_pixels + torch.tensor([16.0, 0.0, 0.0]).type(torch.FloatTensor).to(device), lab_to_fxfyfz)
-
-    # Convert to xyz
-    epsilon = 6.0/29.0
-    linear_mask = (fxfyfz_pixels <= epsilon).type(torch.FloatTensor).to(device)
-    exponential_mask = (fxfyfz_pixels > epsilon).type(torch.FloatTensor).to(device)
-
-    xyz_pixels = (3 * epsilon**2 * (fxfyfz_pixels - 4/29.0)) * linear_mask + ((fxfyfz_pixels+0.000001) ** 3) * exponential_mask
-
-    # Denormalize for D65 white point
-    xyz_pixels = torch.mul(xyz_pixels, torch.tensor([0.950456, 1.0, 1.088754]).type(torch.FloatTensor).to(device))
-
-    xyz_to_rgb = torch.tensor([
-        #     r           g          b
-        [ 3.2404542, -0.9692660,  0.0556434], # x
-        [-1.5371385,  1.8760108, -0.2040259], # y
-        [-0.4985314,  0.0415560,  1.0572252], # z
-    ]).type(torch.FloatTensor).to(device)
-
-    rgb_pixels = torch.mm(xyz_pixels, xyz_to_rgb)
-    
+    f = torch.where(xyz <= _LAB_EPSILON**3, xyz / (3 * _LAB_EPSILON**2) + 4.0/29.0, xyz.clamp(min=0) ** (1.0/3.0))
+    return torch.matmul(f, c["fxfyfz_to_lab"]) - c["lab_offset"]
+
+
+def lab_to_rgb(lab, dtype=None):
+    """Inverse of rgb_to_lab: LAB [..., 3] to sRGB (0-1) [..., 3], on the input's device."""
+    if dtype is None:
+        dtype = lab.dtype if lab.is_floating_point() else torch.float32
+    c = _lab_constants(lab.device, dtype)
+    lab = lab.to(dtype)
+
+    f = torch.matmul(lab + c["lab_offset"], c["lab_to_fxfyfz"])
+    xyz = torch.where(f <= _LAB_EPSILON, 3 * _LAB_EPSILON**2 * (f - 4.0/29.0), f ** 3) * c["white_point"]
+
     # Avoid a slightly negative number messing up the conversion
-    # Clip
-    rgb_pixels = torch.clamp(rgb_pixels, 0.0, 1.0)
-
-    linear_mask = (rgb_pixels <= 0.0031308).type(torch.FloatTensor).to(device)
-    exponential_mask = (rgb_pixels > 0.0031308).type(torch.FloatTensor).to(device)
-    srgb_pixels = (rgb_pixels * 12.92 * linear_mask) + (((rgb_pixels+0.000001) ** (1/2.4) * 1.055) - 0.055) * exponential_mask
-    
-    # Move back to original device if needed
-    if lab.device != device:
-        srgb_pixels = srgb_pixels.to(lab.device)
-        
-    return torch.reshape(srgb_pixels, lab.shape)
\ No newline at end of file
+    rgb = torch.clamp(torch.matmul(xyz, c["xyz_to_rgb"]), 0.0, 1.0)
+    return torch.where(rgb <= 0.0031308, rgb * 12.92, (rgb ** (1/2.4)) * 1.055 - 0.055)
+
+
+if __name__ == "__main__":
+    # Accuracy check against OpenCV's float conversion
+    test_rgb = np.random.rand(4, 64, 64, 3).astype(np.float32)
+    lab_cv = np.stack([cv2.cvtColor(img, cv2.COLOR_RGB2LAB) for img in test_rgb])
+    lab_torch = rgb_to_lab(torch.from_numpy(test_rgb)).numpy()
+    print(f"rgb_to_lab max abs error vs OpenCV: {np.abs(lab_torch - lab_cv).max():.4f}")
+    rgb_back = lab_to_rgb(torch.from_numpy(lab_cv)).numpy()
+    print(f"lab_to_rgb max abs error (round trip): {np.abs(rgb_back - test_rgb).max():.5f}")
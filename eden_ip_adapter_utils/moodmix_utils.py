@@ -6,6 +6,7 @@ import numpy as np
 import time
 from typing import List
 from PIL import ImageOps, Image
+from eden_img_utils.directory_index import get_directory_index
 
 
 def get_id_from_filename(filename):
@@ -43,7 +44,7 @@ def get_filenames_in_a_folder(folder: str):
     if folder[-1] == '/':
         folder = folder[:-1]
         
-    files =  os.listdir(folder)
+    files = get_directory_index().list_names(folder)
     files = [f'{folder}/' + x for x in files]
     return files
 
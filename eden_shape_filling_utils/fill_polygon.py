@@ -1,4 +1,5 @@
 import torch
+import torch.nn.functional as F
 import numpy as np
 from PIL import Image
 import cv2
@@ -41,6 +42,7 @@ class FillConfig:
     color_channel: str = "luminance"
     device: str = 'cuda' if torch.cuda.is_available() else 'cpu'
     loop: bool = True
+    engine: str = "dense"  # "dense" or "sparse" (frontier-only, step cost scales with the perimeter)
 
 class OrganicFill:
     def __init__(self, config: FillConfig):
@@ -72,6 +74,10 @@ class OrganicFill:
 
     def load_image(self, image_path: Path) -> None:
         """Initialize the system from an input image"""
+        self.load_pil_image(Image.open(image_path))
+
+    def load_pil_image(self, img: Image.Image) -> None:
+        """Initialize the system from an already opened image"""
 
         def _calculate_resize_dims(original_size: Tuple[int, int], max_dim: int) -> Tuple[int, int]:
             """Calculate new dimensions maintaining aspect ratio with max dimension constraint"""
@@ -102,8 +108,7 @@ class OrganicFill:
                 # Convert to grayscale using standard luminance formula
                 return np.dot(img_array[...,:3], [0.299, 0.587, 0.114])
 
-        # Load image and handle color channel selection
-        img = Image.open(image_path)
+        # Handle color channel selection
         if self.config.color_channel == "luminance" or img.mode == 'L':
             img = img.convert('L')
             resize_dims = _calculate_resize_dims(img.size, self.config.target_size)
@@ -122,13 +127,17 @@ class OrganicFill:
         self.height, self.width = self.mask.shape
         
         # Initialize state tensors
-        self.grid = torch.zeros_like(self.mask)
-        self.activity_counter = torch.zeros_like(self.mask, dtype=torch.int32)
-        self.active_mask = torch.ones_like(self.mask, dtype=torch.bool)
+        self._init_state()
         
         # Set initial seed
         self._place_seed()
 
+    def _init_state(self) -> None:
+        """Initialize the growth state tensors"""
+        self.grid = torch.zeros_like(self.mask)
+        self.activity_counter = torch.zeros_like(self.mask, dtype=torch.int32)
+        self.active_mask = torch.ones_like(self.mask, dtype=torch.bool)
+
     def _place_seed(self) -> None:
         """Place initial seed(s) in specified position"""
         h, w = self.mask.shape
@@ -336,6 +345,124 @@ class OrganicFill:
         """Get current frame for video"""
         return (self.grid.cpu().numpy() * 255).astype(np.uint8)
 
+class SparseOrganicFill(OrganicFill):
+    """
+    Frontier-only variant of OrganicFill with the same growth rule.
+
+    Only unfilled pixels that touch the filled region can change in a step, so this engine keeps
+    them as a set of flat pixel indices, samples noise for those pixels only and updates the
+    filled set and the frontier incrementally. A step costs time proportional to the perimeter
+    of the filled region instead of its area.
+
+    A frontier pixel is active while some pixel within active_region_padding of it grew during
+    the last stability_threshold steps, which is what the dilated activity mask of the dense
+    engine computes for the pixels that can actually grow. The completion check uses the same
+    rule as the dense engine (no active unfilled pixel anywhere in the mask, not just on the
+    frontier), so both engines stop after the same number of steps on average.
+    """
+
+    _NEIGHBOR_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+    def _init_state(self) -> None:
+        self.grid = torch.zeros_like(self.mask)
+        self.fillable = (self.mask > 0).view(-1)
+        self.mask_area = int(self.fillable.sum().item())
+        # Step at which each pixel last grew (0 for seeds and pixels that never grew)
+        self.last_growth = torch.zeros(self.height * self.width, dtype=torch.int32, device=self.device)
+        pad = self.config.active_region_padding
+        self.window_offsets = torch.arange(-pad, pad + 1, device=self.device)
+        self.filled_count = 0
+        self.frontier = torch.empty(0, dtype=torch.long, device=self.device)
+        self.frontier_active = torch.empty(0, dtype=torch.bool, device=self.device)
+
+    def load_pil_image(self, img: Image.Image) -> None:
+        super().load_pil_image(img)
+        seeded = torch.nonzero(self.grid.view(-1) > 0).squeeze(1)
+        self.filled_count = int(seeded.numel())
+        self.frontier = self._unfilled_neighbors(seeded)
+        # Everything counts as recently active before the first step
+        self.frontier_active = torch.ones_like(self.frontier, dtype=torch.bool)
+
+    def _unfilled_neighbors(self, indices: torch.Tensor) -> torch.Tensor:
+        """Unique flat indices of the fillable, unfilled 8-neighbours of indices"""
+        if indices.numel() == 0:
+            return indices
+        y = indices // self.width
+        x = indices % self.width
+        candidates = []
+        for dy, dx in self._NEIGHBOR_OFFSETS:
+            ny, nx = y + dy, x + dx
+            inside = (ny >= 0) & (ny < self.height) & (nx >= 0) & (nx < self.width)
+            candidates.append((ny * self.width + nx)[inside])
+        candidates = torch.unique(torch.cat(candidates))
+        keep = self.fillable[candidates] & (self.grid.view(-1)[candidates] == 0)
+        return candidates[keep]
+
+    def _update_activity(self) -> None:
+        """Recompute which frontier pixels are close to recent growth"""
+        if self.frontier.numel() == 0:
+            self.frontier_active = torch.empty(0, dtype=torch.bool, device=self.device)
+            return
+        # Gather the (2*padding+1)^2 window around every frontier pixel: [F, K, K].
+        # Clamping to the border only repeats pixels that are inside the window anyway.
+        ny = ((self.frontier // self.width).view(-1, 1, 1) + self.window_offsets.view(1, -1, 1)).clamp(0, self.height - 1)
+        nx = ((self.frontier % self.width).view(-1, 1, 1) + self.window_offsets.view(1, 1, -1)).clamp(0, self.width - 1)
+        latest_growth = self.last_growth[ny * self.width + nx].amax(dim=(1, 2))
+        self.frontier_active = (self.frame_count - latest_growth) < self.config.stability_threshold
+
+    def step(self) -> None:
+        """Perform one growth step on the frontier only"""
+        self.frame_count += 1
+
+        # Apply growth with noise, sampled only for frontier pixels
+        noise = torch.rand(self.frontier.shape, device=self.device) * (
+            self.config.noise_range[1] - self.config.noise_range[0]
+        ) + self.config.noise_range[0]
+
+        grows = self.frontier_active & (noise > self.config.growth_threshold)
+        new_growth = self.frontier[grows]
+        self.grid.view(-1)[new_growth] = 1
+        self.last_growth[new_growth] = self.frame_count
+        self.filled_count += int(new_growth.numel())
+
+        # The frontier loses the pixels that grew and gains their unfilled neighbours
+        self.frontier = torch.unique(torch.cat([self.frontier[~grows], self._unfilled_neighbors(new_growth)]))
+        self._update_activity()
+
+        # Update fill history
+        self.fill_history.append(self.compute_fill_ratio())
+
+    def compute_fill_ratio(self) -> float:
+        """Calculate current fill ratio"""
+        return self.filled_count / max(self.mask_area, 1)
+
+    def is_complete(self) -> bool:
+        """Check if growth is complete"""
+        if len(self.fill_history) < self.config.saturation_window:
+            return False
+
+        recent_change = max(
+            abs(self.fill_history[i] - self.fill_history[i-1])
+            for i in range(-self.config.saturation_window + 1, 0)
+        )
+
+        if recent_change >= self.config.saturation_threshold:
+            return False
+
+        # Same rule as the dense engine: unfilled pixels that are not on the frontier (e.g. mask regions
+        # the fill cannot reach) still count while they are within padding of recent growth
+        pad = self.config.active_region_padding
+        recent = ((self.frame_count - self.last_growth) < self.config.stability_threshold).view(1, 1, self.height, self.width)
+        active = F.max_pool2d(recent.float(), kernel_size=2*pad + 1, stride=1, padding=pad).view(-1) > 0
+        return not bool(torch.any(active & self.fillable & (self.grid.view(-1) == 0)))
+
+    @property
+    def active_mask(self) -> torch.Tensor:
+        """Dense mask of the active frontier pixels (only built on demand, e.g. for progress logs)"""
+        active = torch.zeros(self.height * self.width, dtype=torch.bool, device=self.device)
+        active[self.frontier[self.frontier_active]] = True
+        return active.view(self.height, self.width)
+
 def generate_reverse_frames(forward_frames: List[np.ndarray]) -> List[np.ndarray]:
     """Generate reverse animation frames following the same directional pattern as forward
 
@@ -370,21 +497,32 @@ def generate_reverse_frames(forward_frames: List[np.ndarray]) -> List[np.ndarray
 
     return reverse_frames
 
+def default_output_path(image_path: Path, config: FillConfig, seed_location: Tuple[float, float]) -> str:
+    """Output video path based on the input path and the fill parameters"""
+    seed_x_pct, seed_y_pct = seed_location
+    param_str = f"gt{config.growth_threshold:.1f}_pr{config.position_randomness:.1f}_sr{config.seed_radius}"
+    location_str = f"loc{seed_x_pct:.2f}x{seed_y_pct:.2f}"
+    loop_suffix = "_loop" if config.loop else ""
+    return str(image_path.with_suffix('')) + f"_{param_str}_{location_str}{loop_suffix}_vid.mp4"
+
+def convert_to_web_format(output_path: str) -> None:
+    """Re-encode an mp4v video with libx264 in place"""
+    temp_path = str(Path(output_path).with_suffix('.temp.mp4'))
+    os.rename(output_path, temp_path)
+    os.system(f'ffmpeg -i {temp_path} -vcodec libx264 {output_path} -y')
+    os.remove(temp_path)
+
 def create_animation(image_path: Union[str, Path], output_path: str = None, config: FillConfig = None, save_final_frame: bool = False) -> None:
     """Create organic fill animation from image"""
     image_path = Path(image_path)
     config = config or FillConfig()
 
-    fill = OrganicFill(config)
+    fill = SparseOrganicFill(config) if config.engine == "sparse" else OrganicFill(config)
     fill.load_image(image_path)
 
     # If no output path provided, create one based on input path and parameters
     if output_path is None:
-        seed_x_pct, seed_y_pct = fill.seed_location
-        param_str = f"gt{config.growth_threshold:.1f}_pr{config.position_randomness:.1f}_sr{config.seed_radius}"
-        location_str = f"loc{seed_x_pct:.2f}x{seed_y_pct:.2f}"
-        loop_suffix = "_loop" if config.loop else ""
-        output_path = str(image_path.with_suffix('')) + f"_{param_str}_{location_str}{loop_suffix}_vid.mp4"
+        output_path = default_output_path(image_path, config, fill.seed_location)
 
     video_size = (fill.width, fill.height)
 
@@ -437,15 +575,171 @@ def create_animation(image_path: Union[str, Path], output_path: str = None, conf
         print(f"Final frame saved to {final_image_path}")
 
     # Convert to web-compatible format
-    temp_path = str(Path(output_path).with_suffix('.temp.mp4'))
-    os.rename(output_path, temp_path)
-    os.system(f'ffmpeg -i {temp_path} -vcodec libx264 {output_path} -y')
-    os.remove(temp_path)
+    convert_to_web_format(output_path)
 
     total_frames = fill.frame_count + (len(reverse_frames) if config.loop and 'reverse_frames' in locals() else 0)
     loop_info = " (loopable)" if config.loop else ""
     print(f"Animation completed: {total_frames} frames{loop_info}, saved to {output_path}")
 
+class BatchedOrganicFill:
+    """
+    Runs several OrganicFill variations of the same source image as one batched simulation.
+
+    Every item keeps its own mask, seeds and growth parameters (the configs must share target_size,
+    so all masks have the same shape). Items that complete are frozen and dropped from the per-step
+    computation. Instead of keeping frames, the step at which every pixel filled is recorded and the
+    animation frames are produced from it afterwards.
+    """
+    NOT_FILLED = torch.iinfo(torch.int32).max
+
+    def __init__(self, configs: List[FillConfig]):
+        self.configs = configs
+        self.device = torch.device(configs[0].device)
+        self.n = len(configs)
+        self.frame_count = 0
+
+    def load_image(self, image_path: Path) -> None:
+        """Build the masks and seeds of every item from one decoded image"""
+        img = Image.open(image_path)
+        img.load()
+
+        fills = []
+        for config in self.configs:
+            fill = OrganicFill(config)
+            fill.load_pil_image(img)
+            fills.append(fill)
+        if len({fill.mask.shape for fill in fills}) != 1:
+            raise ValueError("All variations in a batch must produce masks of the same size (same image and target_size)")
+
+        self.height, self.width = fills[0].height, fills[0].width
+        self.seed_locations = [fill.seed_location for fill in fills]
+        self.mask = torch.stack([fill.mask for fill in fills]).to(self.device)  # [N,H,W]
+        self.grid = torch.stack([fill.grid for fill in fills]).to(self.device)  # [N,H,W]
+        self.mask_area = self.mask.sum(dim=(1, 2)).clamp(min=1)
+        self.activity_counter = torch.zeros_like(self.mask, dtype=torch.int32)
+        self.active_mask = torch.ones_like(self.mask, dtype=torch.bool)
+        self.fill_time = torch.full_like(self.mask, self.NOT_FILLED, dtype=torch.int32)
+        self.fill_time.masked_fill_(self.grid > 0, 0)
+
+        # Per-item growth parameters, broadcastable against [N,H,W]
+        def _param(values, dtype=torch.float32):
+            return torch.tensor(values, device=self.device, dtype=dtype).view(-1, 1, 1)
+        self.noise_low = _param([c.noise_range[0] for c in self.configs])
+        self.noise_span = _param([c.noise_range[1] - c.noise_range[0] for c in self.configs])
+        self.growth_threshold = _param([c.growth_threshold for c in self.configs])
+        self.stability_threshold = _param([c.stability_threshold for c in self.configs], torch.int32)
+
+        self.fill_history = [[] for _ in self.configs]
+        self.num_steps = [0] * self.n
+        self.done = [False] * self.n
+
+    def step(self) -> None:
+        """Perform one growth step for every item that is not complete yet"""
+        active_items = [i for i in range(self.n) if not self.done[i]]
+        if not active_items:
+            return
+        self.frame_count += 1
+        idx = torch.tensor(active_items, device=self.device)
+        grid, mask = self.grid[idx], self.mask[idx]
+
+        # Calculate growth boundary (3x3 max == any filled 8-neighbour for unfilled pixels)
+        neighbors = F.max_pool2d(grid.unsqueeze(1), kernel_size=3, stride=1, padding=1).squeeze(1)
+        boundary = (grid == 0) & (mask > 0) & (neighbors > 0) & self.active_mask[idx]
+
+        # Apply growth with noise
+        noise = torch.rand_like(grid) * self.noise_span[idx] + self.noise_low[idx]
+        new_growth = boundary & (noise > self.growth_threshold[idx])
+        grid = grid.masked_fill(new_growth, 1.0)
+
+        # Update activity tracking, dilating with each item's own padding (same as cv2.dilate with a square kernel)
+        counter = torch.where(new_growth, torch.zeros_like(self.activity_counter[idx]), self.activity_counter[idx] + 1)
+        recent = (counter < self.stability_threshold[idx]).float().unsqueeze(1)
+        padded_active = torch.zeros_like(new_growth)
+        paddings = [self.configs[i].active_region_padding for i in active_items]
+        for pad in set(paddings):
+            sel = torch.tensor([j for j, p in enumerate(paddings) if p == pad], device=self.device)
+            padded_active[sel] = F.max_pool2d(recent[sel], kernel_size=2*pad + 1, stride=1, padding=pad).squeeze(1) > 0
+        active = padded_active & (grid < 1) & (mask > 0)
+
+        self.grid[idx] = grid
+        self.activity_counter[idx] = counter
+        self.active_mask[idx] = active
+        self.fill_time[idx] = torch.where(new_growth, torch.full_like(counter, self.frame_count), self.fill_time[idx])
+
+        # Update fill history and per-item completion
+        ratios = ((grid * mask).sum(dim=(1, 2)) / self.mask_area[idx]).tolist()
+        has_active = active.flatten(1).any(dim=1).tolist()
+        for j, i in enumerate(active_items):
+            self.fill_history[i].append(ratios[j])
+            self.num_steps[i] = self.frame_count
+            self.done[i] = self._item_complete(i, has_active[j])
+
+    def _item_complete(self, i: int, has_active: bool) -> bool:
+        """Same completion rule as OrganicFill.is_complete, for item i"""
+        config, history = self.configs[i], self.fill_history[i]
+        if len(history) < config.saturation_window:
+            return False
+        recent_change = max(
+            abs(history[k] - history[k-1])
+            for k in range(-config.saturation_window + 1, 0)
+        )
+        return recent_change < config.saturation_threshold and not has_active
+
+    def is_complete(self) -> bool:
+        return all(self.done)
+
+    def write_video(self, i: int, output_path: str, save_final_frame: bool = False) -> int:
+        """Write the animation of item i (forward, plus reverse if config.loop), returns the frame count"""
+        config = self.configs[i]
+        fill_time = self.fill_time[i].cpu().numpy()
+        num_steps = self.num_steps[i]
+
+        out = cv2.VideoWriter(
+            output_path,
+            cv2.VideoWriter_fourcc(*'mp4v'),
+            config.fps,
+            (self.width, self.height),
+            False
+        )
+        try:
+            # Forward frame k shows the state after step k+1
+            for step in range(1, num_steps + 1):
+                out.write((fill_time <= step).astype(np.uint8) * 255)
+            if config.loop and num_steps > 0:
+                # Same as generate_reverse_frames: pixels turn black in the order they filled
+                final = fill_time <= num_steps
+                for k in range(num_steps):
+                    out.write((final & ~((fill_time >= 2) & (fill_time <= k + 1))).astype(np.uint8) * 255)
+        finally:
+            out.release()
+
+        if save_final_frame:
+            final_image_path = str(Path(output_path).with_suffix('')) + "_final.png"
+            cv2.imwrite(final_image_path, (fill_time <= num_steps).astype(np.uint8) * 255)
+
+        convert_to_web_format(output_path)
+        return num_steps * (2 if config.loop else 1)
+
+def run_fill_batch(image_path: Union[str, Path], configs: List[FillConfig], output_paths: List[str] = None,
+                   save_final_frame: bool = False) -> List[str]:
+    """Create one organic fill animation per config for the same image, simulated as one batch"""
+    image_path = Path(image_path)
+    fill = BatchedOrganicFill(configs)
+    fill.load_image(image_path)
+
+    while not fill.is_complete():
+        fill.step()
+        if fill.frame_count % 100 == 0:
+            print(f"Frame {fill.frame_count}: {fill.n - sum(fill.done)}/{fill.n} variations still growing")
+
+    written = []
+    for i, config in enumerate(configs):
+        output_path = output_paths[i] if output_paths and output_paths[i] else default_output_path(image_path, config, fill.seed_locations[i])
+        total_frames = fill.write_video(i, output_path, save_final_frame)
+        print(f"Animation completed: {total_frames} frames, saved to {output_path}")
+        written.append(output_path)
+    return written
+
 def process_images(input_path: Union[str, Path], config: FillConfig = None) -> None:
     """Process a single image or all images in a directory"""
     input_path = Path(input_path)
@@ -481,9 +775,46 @@ Main Parameters:
 - active_region_padding: Expansion of active growth areas (default: 3)
 - saturation_threshold: Growth completion sensitivity (default: 0.001)
 - fps: Output video frame rate (default: 20.0)
+- engine: "dense" (default) or "sparse" (frontier-only updates, much faster for large target_size)
 """
 
+def compare_engines(config: FillConfig, n_runs: int = 4, max_steps: int = 2000) -> Tuple[float, float, float, float]:
+    """
+    Run the dense and sparse engines on a synthetic mask with an unreachable island and return
+    (dense mean steps, sparse mean steps, dense mean fill ratio, sparse mean fill ratio).
+    """
+    size = config.target_size
+    img = np.full((size, size), 255, np.uint8)
+    cv2.circle(img, (size // 2, size // 2), size // 3, 0, -1)
+    img[size // 2 - 2:size // 2 + 2, :] = 255  # gap splitting the disk
+    img[size // 16:size // 8, size // 16:size // 8] = 0  # separate island
+    img = Image.fromarray(img)
+
+    stats = {}
+    for engine in (OrganicFill, SparseOrganicFill):
+        steps, ratios = [], []
+        for run in range(n_runs):
+            torch.manual_seed(run)
+            fill = engine(config)
+            fill.load_pil_image(img)
+            while not fill.is_complete() and fill.frame_count < max_steps:
+                fill.step()
+            steps.append(fill.frame_count)
+            ratios.append(float(fill.compute_fill_ratio()))
+        stats[engine] = (np.mean(steps), np.mean(ratios))
+
+    (dense_steps, dense_ratio), (sparse_steps, sparse_ratio) = stats[OrganicFill], stats[SparseOrganicFill]
+    return dense_steps, sparse_steps, dense_ratio, sparse_ratio
+
 if __name__ == "__main__":
+    # --- Check that the sparse engine matches the dense one (completion rule, step count, fill ratio) ---
+    check_config = FillConfig(target_size=128, island_connection_radius=0, starting_position=StartPosition.CENTER,
+                              position_randomness=0.0, device='cpu')
+    dense_steps, sparse_steps, dense_ratio, sparse_ratio = compare_engines(check_config)
+    print(f"Dense engine: {dense_steps:.1f} steps, fill {dense_ratio:.2%} | Sparse engine: {sparse_steps:.1f} steps, fill {sparse_ratio:.2%}")
+    assert abs(dense_steps - sparse_steps) <= 0.15 * dense_steps
+    assert abs(dense_ratio - sparse_ratio) < 0.02
+
     config = FillConfig(
         target_size=512,
         growth_threshold=0.5,
@@ -6,15 +6,19 @@ This script takes an input directory of images and generates n variations by:
 1. Randomly selecting an image from the directory
 2. Sampling random parameters from predefined ranges
 3. Running the organic fill algorithm with those parameters
+
+With batch_size > 1, variations that share an image and target size are simulated together
+as one batch (see fill_polygon.BatchedOrganicFill).
 """
 
 import random
 import sys
+import time
 from pathlib import Path
 from typing import List
 import numpy as np
 
-from fill_polygon import FillConfig, StartPosition, create_animation
+from fill_polygon import FillConfig, StartPosition, create_animation, run_fill_batch
 
 
 class ParameterRanges:
@@ -138,7 +142,49 @@ def generate_param_filename(config: FillConfig, base_name: str, output_dir: Path
         return filename
 
 
-def generate_variations(input_dir: Path, n_variations: int = 100, output_dir: Path = None):
+def print_variation(i: int, n_variations: int, image_path: Path, config: FillConfig):
+    print(f"\nVariation {i+1}/{n_variations}:")
+    print(f"  Image: {image_path.name}")
+    print(f"  Target size: {config.target_size}")
+    print(f"  Growth threshold: {config.growth_threshold:.2f}")
+    print(f"  Position randomness: {config.position_randomness:.2f}")
+    print(f"  Starting position: {config.starting_position.value}")
+    print(f"  Seed radius: {config.seed_radius}")
+    print(f"  Invert input: {config.invert_input}")
+    print(f"  Number of seeds: {config.num_seeds}")
+    print(f"  Color channel: {config.color_channel}")
+
+
+def generate_variations_batched(image_files: List[Path], n_variations: int, output_dir: Path = None, batch_size: int = 8) -> int:
+    """
+    Sample all variations up front, group the ones that share an image and target size,
+    and run each group in batches of up to batch_size. Returns the number of successful variations.
+    """
+    groups = {}
+    for i in range(n_variations):
+        image_path = random.choice(image_files)
+        config = sample_random_config()
+        print_variation(i, n_variations, image_path, config)
+        groups.setdefault((image_path, config.target_size), []).append(config)
+
+    successful_generations = 0
+    for (image_path, target_size), configs in groups.items():
+        for start in range(0, len(configs), batch_size):
+            batch = configs[start:start + batch_size]
+            output_paths = None
+            if output_dir:
+                output_paths = [generate_param_filename(config, image_path.stem, output_dir) for config in batch]
+            print(f"\nRunning {len(batch)} variations of {image_path.name} at size {target_size} as one batch")
+            try:
+                run_fill_batch(image_path, batch, output_paths)
+                successful_generations += len(batch)
+            except Exception as e:
+                print(f"Error generating batch for {image_path.name}: {e}")
+
+    return successful_generations
+
+
+def generate_variations(input_dir: Path, n_variations: int = 100, output_dir: Path = None, batch_size: int = 1):
     """Generate n variations of organic fill animations"""
 
     # Get all image files
@@ -155,6 +201,13 @@ def generate_variations(input_dir: Path, n_variations: int = 100, output_dir: Pa
     if output_dir:
         output_dir.mkdir(exist_ok=True)
 
+    start_time = time.time()
+
+    if batch_size > 1:
+        successful_generations = generate_variations_batched(image_files, n_variations, output_dir, batch_size)
+        report_throughput(successful_generations, n_variations, start_time)
+        return
+
     successful_generations = 0
 
     for i in range(n_variations):
@@ -171,16 +224,7 @@ def generate_variations(input_dir: Path, n_variations: int = 100, output_dir: Pa
                 base_name = image_path.stem
                 output_path = generate_param_filename(config, base_name, output_dir)
 
-            print(f"\nVariation {i+1}/{n_variations}:")
-            print(f"  Image: {image_path.name}")
-            print(f"  Target size: {config.target_size}")
-            print(f"  Growth threshold: {config.growth_threshold:.2f}")
-            print(f"  Position randomness: {config.position_randomness:.2f}")
-            print(f"  Starting position: {config.starting_position.value}")
-            print(f"  Seed radius: {config.seed_radius}")
-            print(f"  Invert input: {config.invert_input}")
-            print(f"  Number of seeds: {config.num_seeds}")
-            print(f"  Color channel: {config.color_channel}")
+            print_variation(i, n_variations, image_path, config)
 
             # Create the animation
             create_animation(image_path, output_path, config)
@@ -190,16 +234,24 @@ def generate_variations(input_dir: Path, n_variations: int = 100, output_dir: Pa
             print(f"Error generating variation {i+1}: {e}")
             continue
 
+    report_throughput(successful_generations, n_variations, start_time)
+
+
+def report_throughput(successful_generations: int, n_variations: int, start_time: float):
+    elapsed = time.time() - start_time
+    per_minute = successful_generations / (elapsed / 60.0) if elapsed > 0 else 0.0
     print(f"\nCompleted! Successfully generated {successful_generations}/{n_variations} variations.")
+    print(f"Throughput: {per_minute:.2f} variations per minute ({elapsed:.1f}s total)")
 
 
 def main():
     """Main function"""
     if len(sys.argv) < 2:
-        print("Usage: python many_fill_polygon.py <input_directory> [n_variations] [output_directory]")
+        print("Usage: python many_fill_polygon.py <input_directory> [n_variations] [output_directory] [batch_size]")
         print("  input_directory: Directory containing input images")
         print("  n_variations: Number of variations to generate (default: 100)")
         print("  output_directory: Optional output directory (default: same as input)")
+        print("  batch_size: Variations of the same image simulated together (default: 1, no batching)")
         sys.exit(1)
 
     input_dir = Path(sys.argv[1])
@@ -228,13 +280,21 @@ def main():
                 print(f"Error creating output directory {output_dir}: {e}")
                 sys.exit(1)
 
+    # Parse batch size
+    batch_size = 1
+    if len(sys.argv) >= 5:
+        try:
+            batch_size = int(sys.argv[4])
+        except ValueError:
+            print(f"Error: Invalid batch size: {sys.argv[4]}")
+            sys.exit(1)
+
     # Set random seed for reproducibility (optional)
-    import time
     seed = int(time.time())
     random.seed(seed)
     np.random.seed(seed)
 
-    generate_variations(input_dir, n_variations, output_dir)
+    generate_variations(input_dir, n_variations, output_dir, batch_size)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ import torch.nn.functional as F
 import numpy as np
 import cv2
 import time
+import hashlib
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
 from typing import Tuple, Optional, List, Dict, Any
@@ -16,6 +18,13 @@ try:
 except:
     from .fill_utils import *
 
+try:
+    from eden_img_utils.img_utils import rgb_to_lab
+except ImportError:
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from eden_img_utils.img_utils import rgb_to_lab
+
 # ────────────────────────────────────────────────────────────────────────────────
 #  CONFIG & ENUMS
 # ────────────────────────────────────────────────────────────────────────────────
@@ -51,10 +60,46 @@ class FillNodeConfig:
     circular_radius_sensitivity: float = 0.3  # How sensitive circular bias is to radius deviation (0.1-1.0)
     organic_bias_range: float = 0.3  # Range of organic bias multiplier: (1-range) to (1+range)
 
+    # Simulation loop parameters
+    completion_check_interval: int = 10  # Only check for completion (a host sync) every k steps
+    diagnostics: bool = False  # Print per-step debug statistics (forces a device sync every step)
+    debug_maps: bool = False  # Keep the individual growth probability maps (returned by the node, never written to disk)
+
+    # Multi-resolution (coarse-to-fine) simulation
+    # Cost: N/factor coarse steps on a 1/factor^2 grid plus N/factor * substeps full resolution steps
+    # (each still over the whole H x W grid), i.e. about substeps/factor of the single-resolution work.
+    pyramid_factor: int = 1  # Simulate growth at 1/factor resolution, then refine at full resolution (1 = off, else >= 4)
+    pyramid_refine_substeps: int = 1  # Full resolution growth steps per coarse step in the refinement band
+    pyramid_band: float = 1.0  # Half width of the refinement band around the frontier, in coarse steps
+
 # ────────────────────────────────────────────────────────────────────────────────
 #  UTILITY FUNCTIONS
 # ────────────────────────────────────────────────────────────────────────────────
 
+# Fill time of pixels that never got filled (compares greater than any step number)
+FILL_TIME_NOT_FILLED = torch.iinfo(torch.int32).max
+
+def select_frame_steps(num_steps: int, n_frames: int) -> List[int]:
+    """
+    Pick the simulation steps to show as n_frames equally spaced animation frames.
+    Step k is the fill state after k growth steps (0 = only the seeds).
+    """
+    if num_steps == 0:
+        return [0] * n_frames
+    if num_steps < n_frames:
+        # Every step, then repeat the last one to reach n_frames
+        return list(range(1, num_steps + 1)) + [num_steps] * (n_frames - num_steps)
+    if n_frames == 1:
+        return [num_steps]
+    # Equally spaced steps from 1 to num_steps
+    return [int(i * (num_steps - 1) / (n_frames - 1)) + 1 for i in range(n_frames)]
+
+def fill_time_to_frames(fill_time: torch.Tensor, frame_steps: List[int]) -> torch.Tensor:
+    """Threshold an int32 event-time map [..., H, W] into float 0/1 frames [N, ..., H, W]."""
+    steps = torch.tensor(frame_steps, device=fill_time.device, dtype=torch.int32)
+    steps = steps.view(-1, *([1] * fill_time.dim()))
+    return (fill_time.unsqueeze(0) <= steps).float()
+
 _SOBEL_X = torch.tensor([[1., 0., -1.], [2., 0., -2.], [1., 0., -1.]]).view(1,1,3,3)
 _SOBEL_Y = torch.tensor([[1., 2.,  1.], [0., 0.,  0.], [-1., -2., -1.]]).view(1,1,3,3)
 
@@ -69,35 +114,79 @@ def _sobel_grad(img: torch.Tensor) -> torch.Tensor:
     return mag.squeeze(1)  # [B,H,W]
 
 def _image_bhwc_to_lab_bhwc(img_bhwc: torch.Tensor) -> torch.Tensor:
-    """Convert RGB image tensor [B,H,W,C] (0-1 float) to full LAB colorspace [B,H,W,3]."""
-    B, H, W, C = img_bhwc.shape
-    lab_batch = []
-    device = img_bhwc.device
-    img_bhwc_cpu_numpy = (img_bhwc.cpu().numpy() * 255).astype(np.uint8)
-
-    for b in range(B):
-        img_hwc = img_bhwc_cpu_numpy[b]
-        # Ensure 3 channels for RGB conversion
-        if C == 1:
-            img_hwc = cv2.cvtColor(img_hwc, cv2.COLOR_GRAY2RGB)
-        elif C != 3:
-             raise ValueError(f"Input image must have 1 or 3 channels, got {C}")
-        
-        lab_hwc = cv2.cvtColor(img_hwc, cv2.COLOR_RGB2LAB)
-        # Normalize LAB channels: L* (0-100) -> (0-1), a* and b* (-127 to 127) -> (0-1)
-        lab_hwc_norm = lab_hwc.astype(np.float32)
-        lab_hwc_norm[..., 0] /= 100.0  # L* channel: 0-100 -> 0-1
-        lab_hwc_norm[..., 1] = (lab_hwc_norm[..., 1] + 127.0) / 254.0  # a* channel: -127 to 127 -> 0-1
-        lab_hwc_norm[..., 2] = (lab_hwc_norm[..., 2] + 127.0) / 254.0  # b* channel: -127 to 127 -> 0-1
-        
-        lab_batch.append(torch.from_numpy(lab_hwc_norm))
-
-    return torch.stack(lab_batch).to(device) # [B,H,W,3]
+    """Convert RGB image tensor [B,H,W,C] (0-1 float) to full LAB colorspace [B,H,W,3], on the image's device."""
+    C = img_bhwc.shape[-1]
+    # Ensure 3 channels for RGB conversion
+    if C == 1:
+        img_bhwc = img_bhwc.expand(-1, -1, -1, 3)
+    elif C != 3:
+        raise ValueError(f"Input image must have 1 or 3 channels, got {C}")
+
+    lab = rgb_to_lab(img_bhwc.clamp(0.0, 1.0), dtype=torch.float32)  # L* 0-100, a*/b* ~ -110..110
+    # Normalize LAB channels on the same scale as the earlier 8-bit OpenCV path
+    # (which stored L* as 0-255 and offset a*/b* by 128), so the similarity maps are unchanged
+    L = lab[..., 0] * (255.0 / 100.0) / 100.0
+    a = (lab[..., 1] + 128.0 + 127.0) / 254.0
+    b = (lab[..., 2] + 128.0 + 127.0) / 254.0
+    return torch.stack([L, a, b], dim=-1) # [B,H,W,3]
+
+def _color_similarity_kernel_size(H: int, W: int, kernel_size_f: float) -> int:
+    kernel_size = int(kernel_size_f * (H + W) / 2)
+    return kernel_size if kernel_size % 2 == 1 else kernel_size + 1
 
 def _compute_color_similarity_growth_prob(lab_bhwc: torch.Tensor, kernel_size_f: float = 0.01) -> torch.Tensor:
     """
     Compute growth probability based on perceptual color similarity in LAB space.
     Areas with similar colors get high growth probability.
+
+    Computes the same local variance of center-to-neighbour color distances as the F.unfold
+    reference below, but accumulates the first two moments of the distances one window offset
+    at a time. Memory is O(B*H*W) independent of the kernel size, and the whole batch is
+    processed at once.
+
+    Args:
+        lab_bhwc: [B,H,W,3] LAB color space image (normalized 0-1)
+        kernel_size_f: Size of local neighborhood for color similarity computation (fraction of image size)
+
+    Returns:
+        color_grow_prob: [B,H,W] growth probability map (0-1)
+    """
+    B, H, W, C = lab_bhwc.shape
+    device = lab_bhwc.device
+
+    kernel_size = _color_similarity_kernel_size(H, W, kernel_size_f)
+    pad_size = kernel_size // 2
+    n = kernel_size * kernel_size
+
+    # Perceptual channel weights applied up front: w * (q - c) == w*q - w*c
+    lab_weights = torch.tensor([0.6, 0.2, 0.2], device=device, dtype=lab_bhwc.dtype).view(1, 3, 1, 1)
+    lab_bchw = lab_bhwc.permute(0, 3, 1, 2) * lab_weights  # [B,3,H,W]
+    lab_padded = F.pad(lab_bchw, (pad_size, pad_size, pad_size, pad_size), mode='reflect')  # [B,3,H+pad,W+pad]
+
+    # Running sums of the distances and squared distances over the window
+    sum_d = torch.zeros((B, H, W), device=device, dtype=lab_bchw.dtype)
+    sum_d2 = torch.zeros((B, H, W), device=device, dtype=lab_bchw.dtype)
+    for dy in range(kernel_size):
+        for dx in range(kernel_size):
+            neighbour = lab_padded[:, :, dy:dy + H, dx:dx + W]
+            d2 = torch.sum((neighbour - lab_bchw)**2, dim=1)  # [B,H,W]
+            sum_d2 += d2
+            sum_d += torch.sqrt(d2)
+
+    # Unbiased variance (like torch.var) of the distances
+    if n > 1:
+        color_variance = torch.clamp((sum_d2 - sum_d**2 / n) / (n - 1), min=0.0)
+    else:
+        color_variance = torch.zeros_like(sum_d)
+
+    # Convert variance to similarity (high variance = low similarity)
+    color_grow_prob = torch.exp(-color_variance * 10.0)  # Scale factor controls sensitivity
+    return torch.clamp(color_grow_prob, 0.0, 1.0)
+
+def _compute_color_similarity_growth_prob_unfold(lab_bhwc: torch.Tensor, kernel_size_f: float = 0.01) -> torch.Tensor:
+    """
+    Reference F.unfold implementation of _compute_color_similarity_growth_prob.
+    Needs a [3, K^2, H, W] tensor per image, so only use it at small sizes (e.g. to validate the fast path).
     
     Args:
         lab_bhwc: [B,H,W,3] LAB color space image (normalized 0-1)
@@ -109,8 +198,7 @@ def _compute_color_similarity_growth_prob(lab_bhwc: torch.Tensor, kernel_size_f:
     B, H, W, C = lab_bhwc.shape
     device = lab_bhwc.device
 
-    kernel_size = int(kernel_size_f * (H + W) / 2)
-    kernel_size = kernel_size if kernel_size % 2 == 1 else kernel_size + 1
+    kernel_size = _color_similarity_kernel_size(H, W, kernel_size_f)
     
     # Use adaptive weights for LAB channels based on perceptual importance
     # L* is most perceptually important, a* and b* contribute to color similarity
@@ -199,6 +287,28 @@ def _sam_rgb_to_color_transition_penalty(sam_rgb_bhwc: torch.Tensor, threshold_v
     penalty_bhw = torch.stack(penalty_maps)  # [B,H,W]
     return torch.clamp(penalty_bhw, 0.0, 1.0)
 
+# ────────────────────────────────────────────────────────────────────────────────
+#  GROWTH PROBABILITY CACHE
+# ────────────────────────────────────────────────────────────────────────────────
+
+# The growth probability field only depends on the input maps, the map weights and the processing
+# resolution, not on the fill dynamics. Re-runs that only change e.g. growth_threshold or
+# jitter_strength reuse the cached field instead of recomputing LAB / color variance / Sobel maps.
+GROW_PROB_CACHE_SIZE = 8
+_grow_prob_cache: "OrderedDict[str, torch.Tensor]" = OrderedDict()
+
+def _hash_tensor(hasher, t: Optional[torch.Tensor]):
+    """Feed shape, dtype and contents of a tensor (or None) into a hashlib hasher."""
+    if t is None:
+        hasher.update(b"none")
+        return
+    t = t.detach()
+    hasher.update(f"{tuple(t.shape)}|{t.dtype}|".encode("utf-8"))
+    hasher.update(np.ascontiguousarray(t.cpu().float().numpy()).data)
+
+def clear_grow_prob_cache():
+    _grow_prob_cache.clear()
+
 # ────────────────────────────────────────────────────────────────────────────────
 #  CORE ORGANIC‑FILL IMPLEMENTATION (BATCH‑AWARE)
 # ────────────────────────────────────────────────────────────────────────────────
@@ -242,23 +352,59 @@ class OrganicFillBatch:
         
         # Grids
         self.filled_region = torch.zeros_like(self.mask)
+        self.growth_limit: Optional[torch.Tensor] = None  # Optional [B,H,W] bool mask restricting where growth can happen
+        # Pixel coordinate grids, built once and broadcast against the batch: [1, H, W]
+        y_grid, x_grid = torch.meshgrid(torch.arange(H, device=self.device, dtype=torch.float32),
+                                        torch.arange(W, device=self.device, dtype=torch.float32),
+                                        indexing='ij')
+        self.y_grid = y_grid.unsqueeze(0)
+        self.x_grid = x_grid.unsqueeze(0)
         self.frame_count = 0
-        self.fill_history: List[torch.Tensor] = []
+        # Fill ratio history as a device-resident ring buffer over the saturation window: [Window, B]
+        self.fill_history = torch.zeros((max(self.cfg.saturation_window, 2), B), device=self.device, dtype=torch.float32)
+        self.history_len = 0
+        self.mask_area = torch.sum(self.mask > 0.5, dim=(1,2)).float()  # [B] - actual fillable pixels per batch
 
         # Precompute sobel kernels on device
         global _SOBEL_X, _SOBEL_Y
         _SOBEL_X = _SOBEL_X.to(self.device)
         _SOBEL_Y = _SOBEL_Y.to(self.device)
 
-        print(f"Preparing growth probability fields on {self.device}...")
-        self._prepare_grow_prob_fields()
+        # Individual growth probability maps (name -> [B,H,W]), only kept when cfg.debug_maps is set
+        self.debug_maps: Dict[str, torch.Tensor] = {}
+
+        cache_key = self._grow_prob_cache_key()
+        # The cache only holds the combined field, so compute the maps again when they are requested
+        cached_grow_prob = None if self.cfg.debug_maps else _grow_prob_cache.get(cache_key)
+        if cached_grow_prob is not None:
+            print("Reusing cached growth probability field.")
+            _grow_prob_cache.move_to_end(cache_key)
+            self.grow_prob = cached_grow_prob
+        else:
+            print(f"Preparing growth probability fields on {self.device}...")
+            self._prepare_grow_prob_fields(keep_maps=self.cfg.debug_maps)
+            _grow_prob_cache[cache_key] = self.grow_prob
+            while len(_grow_prob_cache) > GROW_PROB_CACHE_SIZE:
+                _grow_prob_cache.popitem(last=False)
         self._place_seeds()
 
+    def _grow_prob_cache_key(self) -> str:
+        """Content hash of everything _prepare_grow_prob_fields depends on."""
+        hasher = hashlib.sha1()
+        for t in (self.input_image, self.sam_rgb, self.depth, self.canny, self.hed):
+            _hash_tensor(hasher, t)
+        cfg = self.cfg
+        hasher.update(f"{cfg.weight_lab}|{cfg.weight_sam}|{cfg.weight_depth}|{cfg.weight_canny}|{cfg.weight_hed}|{self.device}".encode("utf-8"))
+        return hasher.hexdigest()
+
     # ────────────────────────────────────────────────────────────────────────
     #  GROWTH PROBABILITY FIELD
     # ────────────────────────────────────────────────────────────────────────
-    def _prepare_grow_prob_fields(self, save_maps: bool = True):
-        """Compute independent growth probability maps for each input and combine with weighted sum."""
+    def _prepare_grow_prob_fields(self, keep_maps: bool = False):
+        """
+        Compute independent growth probability maps for each input and combine with weighted sum.
+        With keep_maps, the individual maps are stored in self.debug_maps for inspection.
+        """
         B, H, W = self.B, self.H, self.W
         device = self.device
 
@@ -280,8 +426,8 @@ class OrganicFillBatch:
         lab_grow_prob = _compute_color_similarity_growth_prob(lab_bhwc)  # [B,H,W]
         lab_grow_prob = normalize_tensor(lab_grow_prob)  # [B,H,W] 0-1
         
-        if save_maps:
-            comfy_tensor_to_pil(lab_grow_prob.unsqueeze(-1)).save('grow_prob_lab.png')
+        if keep_maps:
+            self.debug_maps['lab'] = lab_grow_prob
         grow_prob_maps.append(lab_grow_prob)
         weights.append(self.cfg.weight_lab)
 
@@ -294,8 +440,8 @@ class OrganicFillBatch:
             sam_grow_prob = 1.0 - sam_penalty
             sam_grow_prob = normalize_tensor(sam_grow_prob)  # [B,H,W] 0-1
 
-            if save_maps:
-                comfy_tensor_to_pil(sam_grow_prob.unsqueeze(-1)).save('grow_prob_sam.png')
+            if keep_maps:
+                self.debug_maps['sam'] = sam_grow_prob
             grow_prob_maps.append(sam_grow_prob)
             weights.append(self.cfg.weight_sam)
 
@@ -307,8 +453,8 @@ class OrganicFillBatch:
             # High depth gradient -> low growth probability
             depth_grow_prob = torch.exp(-4 * depth_grad_mag)
             depth_grow_prob = normalize_tensor(depth_grow_prob)  # [B,H,W] 0-1
-            if save_maps:
-                comfy_tensor_to_pil(depth_grow_prob.unsqueeze(-1)).save('grow_prob_depth.png')
+            if keep_maps:
+                self.debug_maps['depth'] = depth_grow_prob
             grow_prob_maps.append(depth_grow_prob)
             weights.append(self.cfg.weight_depth)
 
@@ -318,8 +464,8 @@ class OrganicFillBatch:
             # High edge strength -> low growth probability
             canny_grow_prob = 1.0 - c_norm
             canny_grow_prob = normalize_tensor(canny_grow_prob)  # [B,H,W] 0-1
-            if save_maps:
-                comfy_tensor_to_pil(canny_grow_prob.unsqueeze(-1)).save('grow_prob_canny.png')
+            if keep_maps:
+                self.debug_maps['canny'] = canny_grow_prob
             grow_prob_maps.append(canny_grow_prob)
             weights.append(self.cfg.weight_canny)
 
@@ -329,8 +475,8 @@ class OrganicFillBatch:
             # High edge strength -> low growth probability
             hed_grow_prob = 1.0 - h_norm
             hed_grow_prob = normalize_tensor(hed_grow_prob)  # [B,H,W] 0-1
-            if save_maps:
-                comfy_tensor_to_pil(hed_grow_prob.unsqueeze(-1)).save('grow_prob_hed.png')
+            if keep_maps:
+                self.debug_maps['hed'] = hed_grow_prob
             grow_prob_maps.append(hed_grow_prob)
             weights.append(self.cfg.weight_hed)
 
@@ -366,8 +512,8 @@ class OrganicFillBatch:
             prob_min, prob_max, prob_mean = self.grow_prob.min().item(), self.grow_prob.max().item(), self.grow_prob.mean().item()
             print(f"Boosted growth probability: range=[{prob_min:.3f}, {prob_max:.3f}], mean={prob_mean:.3f}")
 
-        if save_maps:
-            comfy_tensor_to_pil(self.grow_prob.unsqueeze(-1)).save('grow_prob.png')
+        if keep_maps:
+            self.debug_maps['combined'] = self.grow_prob
 
     # ────────────────────────────────────────────────────────────────────────
     #  SEED PLACEMENT
@@ -383,6 +529,11 @@ class OrganicFillBatch:
 
         # Apply the mask to the grid
         self.filled_region = self.filled_region * (self.mask > 0.5)
+
+        # Event-time map: the step at which every pixel got filled (0 for seeds).
+        # Any frame of the animation can be rebuilt from it, so frames don't need to be stored.
+        self.fill_time = torch.full((B,H,W), FILL_TIME_NOT_FILLED, device=self.device, dtype=torch.int32)
+        self.fill_time.masked_fill_(self.filled_region > 0, 0)
         
         # Debug: Print total seeded area per batch
         for b in range(B):
@@ -404,13 +555,13 @@ class OrganicFillBatch:
         has_filled_neighbour = (neighbours.squeeze(1) > 0) & (self.filled_region == 0)
 
         P = self.grow_prob
+        # Debug statistics need .item() calls, which stall the device on every step
+        diagnostics = self.cfg.diagnostics and (self.frame_count % 10 == 0 or self.frame_count < 5)
 
-        # DEBUG: Track key metrics
-        total_filled = torch.sum(self.filled_region).item()
-        total_unfilled = torch.sum((self.filled_region == 0) & (self.mask > 0.5)).item()
-        total_with_neighbor = torch.sum(has_filled_neighbour).item()
-        
-        if self.frame_count % 10 == 0 or self.frame_count < 5:  # Print every 10 steps or first 5 steps
+        if diagnostics:  # Print every 10 steps or first 5 steps
+            total_filled = torch.sum(self.filled_region).item()
+            total_unfilled = torch.sum((self.filled_region == 0) & (self.mask > 0.5)).item()
+            total_with_neighbor = torch.sum(has_filled_neighbour).item()
             prob_min, prob_max, prob_mean = P.min().item(), P.max().item(), P.mean().item()
             print(f"Step {self.frame_count}: filled={total_filled}, unfilled={total_unfilled}, with_neighbor={total_with_neighbor}")
             print(f"  Growth prob: min={prob_min:.4f}, max={prob_max:.4f}, mean={prob_mean:.4f}")
@@ -421,51 +572,32 @@ class OrganicFillBatch:
         # 2. Inside the main mask (mask > 0)
         # 3. Have a filled neighbour (has_filled_neighbour)
         potential_growth_base = (self.filled_region == 0) & (self.mask > 0.5) & has_filled_neighbour
+        if self.growth_limit is not None:
+            potential_growth_base = potential_growth_base & self.growth_limit
 
         # ═══ ORGANIC GROWTH ENHANCEMENTS ═══
         
         # 1. Add circular bias: compute distance from center of mass of filled region
-        if torch.sum(self.filled_region) > 0:
-            # Compute center of mass for each batch item
-            centers_of_mass = []
-            circular_bias_maps = []
-            
-            for b in range(B):
-                filled_b = self.filled_region[b]
-                if torch.sum(filled_b) > 0:
-                    # Find center of mass
-                    y_coords, x_coords = torch.where(filled_b > 0.5)
-                    center_y = torch.mean(y_coords.float())
-                    center_x = torch.mean(x_coords.float())
-                    centers_of_mass.append((center_y, center_x))
-                    
-                    # Create coordinate grids
-                    y_grid, x_grid = torch.meshgrid(torch.arange(H, device=self.device, dtype=torch.float32),
-                                                   torch.arange(W, device=self.device, dtype=torch.float32), 
-                                                   indexing='ij')
-                    
-                    # Compute distance from center of mass
-                    dist_from_center = torch.sqrt((y_grid - center_y)**2 + (x_grid - center_x)**2)
-                    
-                    # Create circular bias: prefer growth that maintains roundness
-                    # Find the current "radius" of filled region
-                    filled_dists = dist_from_center[filled_b > 0.5]
-                    if len(filled_dists) > 0:
-                        avg_radius = torch.mean(filled_dists)
-                        # Bias toward growth at similar distance from center (circular shell)
-                        radius_diff = torch.abs(dist_from_center - avg_radius)
-                        circular_bias = torch.exp(-radius_diff / (avg_radius * self.cfg.circular_radius_sensitivity))  # Prefer growth near current radius
-                    else:
-                        circular_bias = torch.ones_like(dist_from_center)
-                    
-                    circular_bias_maps.append(circular_bias)
-                else:
-                    centers_of_mass.append((H//2, W//2))  # Default center
-                    circular_bias_maps.append(torch.ones(H, W, device=self.device))
-            
-            circular_bias_batch = torch.stack(circular_bias_maps)  # [B, H, W]
-        else:
-            circular_bias_batch = torch.ones(B, H, W, device=self.device)
+        # Centers of mass and mean radius for the whole batch via masked reductions
+        filled = (self.filled_region > 0.5).float()  # [B, H, W]
+        filled_count = filled.sum(dim=(1, 2))  # [B]
+        has_filled = filled_count > 0
+        safe_count = filled_count.clamp(min=1.0)
+        center_y = (filled * self.y_grid).sum(dim=(1, 2)) / safe_count  # [B]
+        center_x = (filled * self.x_grid).sum(dim=(1, 2)) / safe_count  # [B]
+
+        # Compute distance from center of mass: [B, H, W]
+        dist_from_center = torch.sqrt((self.y_grid - center_y.view(B, 1, 1))**2 + (self.x_grid - center_x.view(B, 1, 1))**2)
+
+        # Create circular bias: prefer growth that maintains roundness
+        # Find the current "radius" of filled region
+        avg_radius = (dist_from_center * filled).sum(dim=(1, 2)) / safe_count  # [B]
+        radius_scale = (avg_radius * self.cfg.circular_radius_sensitivity).clamp(min=1e-6).view(B, 1, 1)
+        # Bias toward growth at similar distance from center (circular shell)
+        radius_diff = torch.abs(dist_from_center - avg_radius.view(B, 1, 1))
+        circular_bias_batch = torch.exp(-radius_diff / radius_scale)  # Prefer growth near current radius
+        # Items without any filled pixels get no bias
+        circular_bias_batch = torch.where(has_filled.view(B, 1, 1), circular_bias_batch, torch.ones_like(circular_bias_batch))
 
         # 2. Add directional jitter for organic edges
         # Create random directional noise to break up straight lines
@@ -501,11 +633,6 @@ class OrganicFillBatch:
             relaxed_threshold = self.cfg.growth_threshold * (1 - alpha * self.cfg.barrier_override_scaling)
             potential_growth = potential_growth_base & (P > relaxed_threshold) & neighbor_sampling_mask
 
-        # DEBUG: Track potential growth areas
-        total_potential_base = torch.sum(potential_growth_base).item()
-        total_potential_final = torch.sum(potential_growth).item()
-        total_above_threshold = torch.sum((self.filled_region == 0) & (self.mask > 0.5) & (P > relaxed_threshold)).item()
-
         # --- Stochastic Growth (enhanced) ---
         # Generate random noise for stochastic decision making
         noise = torch.rand_like(self.filled_region, device=self.device)
@@ -516,10 +643,13 @@ class OrganicFillBatch:
         
         # New growth happens where potential exists AND noise < biased_effective_probability
         new_growth = potential_growth & (noise < biased_effective_prob)
-        total_new_growth = torch.sum(new_growth).item()
 
         # DEBUG: Print detailed step info
-        if self.frame_count % 10 == 0 or self.frame_count < 5 or total_new_growth == 0:
+        if diagnostics:
+            total_potential_base = torch.sum(potential_growth_base).item()
+            total_potential_final = torch.sum(potential_growth).item()
+            total_above_threshold = torch.sum((self.filled_region == 0) & (self.mask > 0.5) & (P > relaxed_threshold)).item()
+            total_new_growth = torch.sum(new_growth).item()
             eff_prob_min, eff_prob_max, eff_prob_mean = biased_effective_prob.min().item(), biased_effective_prob.max().item(), biased_effective_prob.mean().item()
             print(f"  Potential: base={total_potential_base}, final={total_potential_final}, above_thresh={total_above_threshold}")
             print(f"  Biased effective prob: min={eff_prob_min:.4f}, max={eff_prob_max:.4f}, mean={eff_prob_mean:.4f}")
@@ -527,16 +657,19 @@ class OrganicFillBatch:
             if total_new_growth == 0 and total_potential_final > 0:
                 print(f"  WARNING: No growth despite {total_potential_final} potential pixels!")
 
-        # Update grid
-        self.filled_region[new_growth] = 1.0
+        # Update grid (masked_fill_ avoids the nonzero() sync of boolean index assignment)
+        self.filled_region.masked_fill_(new_growth, 1.0)
+        self.fill_time.masked_fill_(new_growth, self.frame_count)
 
         # Calculate fill ratio and track history
         fill_ratio = self.fill_ratio()
-        self.fill_history.append(fill_ratio.clone()) # Store fill ratio per batch item
+        self.fill_history[self.history_len % self.fill_history.shape[0]] = fill_ratio # Store fill ratio per batch item
+        self.history_len += 1
 
-        # Return total boundary pixels for progress reporting
-        boundary_count = torch.sum(has_filled_neighbour & (self.filled_region == 0) & (self.mask > 0.5)).item()
-        avg_fill_ratio = fill_ratio.mean().item()
+        # Return total boundary pixels and mean fill ratio for progress reporting.
+        # Both stay on the device; callers only pay for a sync when they read them.
+        boundary_count = torch.sum(has_filled_neighbour & (self.filled_region == 0) & (self.mask > 0.5))
+        avg_fill_ratio = fill_ratio.mean()
         return boundary_count, avg_fill_ratio
 
     # ────────────────────────────────────────────────────────────────────────
@@ -544,8 +677,7 @@ class OrganicFillBatch:
     # ────────────────────────────────────────────────────────────────────────
     def fill_ratio(self):
         """Calculate fill ratio per batch item using actual mask area."""
-        # Calculate actual mask area per batch item
-        mask_area = torch.sum(self.mask > 0.5, dim=(1,2)).float()  # [B] - actual fillable pixels per batch
+        mask_area = self.mask_area  # [B] - actual fillable pixels per batch
         filled_area = self.filled_region.sum(dim=(1,2)).float()  # [B] - filled pixels per batch
         # Avoid division by zero if mask area is zero for some batch items
         ratio = torch.where(mask_area > 0, filled_area / mask_area, torch.zeros_like(mask_area, device=self.device))
@@ -555,12 +687,13 @@ class OrganicFillBatch:
         """Check completion based on fill saturation and active pixels per batch item."""
         B = self.B
         # Check 1: Minimum number of steps reached for saturation check
-        if len(self.fill_history) < self.cfg.saturation_window:
+        window = self.fill_history.shape[0]
+        if self.history_len < window:
             return False
 
         # Check 2: Fill ratio saturation (per batch item)
-        # Stack recent history: List of [B] tensors -> Tensor [Window, B]
-        recent_history = torch.stack(self.fill_history[-self.cfg.saturation_window:])
+        # Unroll the ring buffer into chronological order: [Window, B]
+        recent_history = torch.roll(self.fill_history, -(self.history_len % window), dims=0)
         # Calculate max absolute change over the window for each batch item: [B]
         max_change = torch.max(torch.abs(recent_history[1:] - recent_history[:-1]), dim=0)[0]
         saturated = max_change < self.cfg.saturation_threshold
@@ -578,20 +711,93 @@ class OrganicFillBatch:
         is_done = saturated | no_more_boundary
 
         # DEBUG: Print completion status details
-        if self.frame_count % 10 == 0 or torch.any(no_more_boundary) or torch.any(saturated):
+        if self.cfg.diagnostics:
             boundary_count_per_batch = boundary_pixels.sum(dim=(1,2))
-            print(f"  Completion check: saturation_window={len(self.fill_history)}/{self.cfg.saturation_window}")
+            print(f"  Completion check: saturation_window={min(self.history_len, window)}/{window}")
             print(f"  Max changes: {max_change.cpu().numpy()}, threshold={self.cfg.saturation_threshold}")
             print(f"  Saturated: {saturated.cpu().numpy()}, No boundary: {no_more_boundary.cpu().numpy()}")
             print(f"  Boundary pixels per batch: {boundary_count_per_batch.cpu().numpy()}")
             print(f"  Is done: {is_done.cpu().numpy()}")
 
         # The whole process is complete if *all* batch items are done
-        return torch.all(is_done)
+        return bool(torch.all(is_done))
 
     def get_frame(self):
         return self.filled_region.clone()  # [B,H,W] float 0/1
 
+    def get_frame_at(self, step: int):
+        """Fill state after the given step, rebuilt from the event-time map."""
+        return (self.fill_time <= step).float()  # [B,H,W] float 0/1
+
+# ────────────────────────────────────────────────────────────────────────────────
+#  MULTI-RESOLUTION (COARSE-TO-FINE) FILL
+# ────────────────────────────────────────────────────────────────────────────────
+
+# Below this the dense full resolution refinement costs about as much as a single-resolution run
+MIN_PYRAMID_FACTOR = 4
+PYRAMID_FACTOR_CHOICES = [1] + list(range(MIN_PYRAMID_FACTOR, 9))
+
+def _downsample_fill_inputs(fill_inputs: Dict[str, Optional[torch.Tensor]], factor: int) -> Dict[str, Optional[torch.Tensor]]:
+    """Downsample the OrganicFillBatch inputs ([B,H,W,C] images, [B,H,W] maps) by an integer factor."""
+    B, H, W = fill_inputs["base_mask"].shape
+    size = (max(2, H // factor), max(2, W // factor))
+
+    def _area(t: torch.Tensor) -> torch.Tensor:
+        if t.dim() == 4:  # BHWC
+            return F.interpolate(t.permute(0, 3, 1, 2).float(), size=size, mode='area').permute(0, 2, 3, 1)
+        return F.interpolate(t.unsqueeze(1).float(), size=size, mode='area').squeeze(1)
+
+    coarse = {k: (_area(v) if v is not None else None) for k, v in fill_inputs.items()}
+    # Keep every seed (even single pixel ones) and binarize the fillable mask
+    coarse["seed_locations"] = (coarse["seed_locations"] > 0).float()
+    coarse["base_mask"] = (coarse["base_mask"] >= 0.5).float()
+    return coarse
+
+def refine_fill_pyramid(coarse_fill: OrganicFillBatch, fill_inputs: Dict[str, Optional[torch.Tensor]],
+                        cfg: FillNodeConfig) -> OrganicFillBatch:
+    """
+    Refine the event-time map of a coarse OrganicFillBatch run at full resolution.
+
+    The coarse fill times are upsampled (bilinear, so the fronts stay smooth). For every coarse step t,
+    full resolution pixels more than cfg.pyramid_band steps behind the upsampled frontier are filled
+    directly and cfg.pyramid_refine_substeps regular growth steps, limited to the band ahead of it,
+    add the fine-scale organic detail. Returns the full resolution fill, with fill_time and
+    frame_count expressed in coarse steps.
+
+    Each refinement step is a regular dense step over the whole H x W grid (growth_limit only restricts
+    where pixels may fill), so refinement costs num_steps * substeps full resolution steps. Together with
+    the coarse run that is about substeps/factor of the single-resolution work, which is why
+    MIN_PYRAMID_FACTOR is 4.
+    """
+    num_steps = coarse_fill.frame_count
+    band = cfg.pyramid_band
+    fine = OrganicFillBatch(**fill_inputs, config=cfg)
+    B, H, W = fine.B, fine.H, fine.W
+
+    # Pixels that never filled in the coarse run must stay out of every band
+    coarse_time = coarse_fill.fill_time.float()
+    coarse_time.masked_fill_(coarse_fill.fill_time == FILL_TIME_NOT_FILLED, num_steps + 2 * band + 2)
+    up_time = F.interpolate(coarse_time.unsqueeze(1), size=(H, W), mode='bilinear', align_corners=False).squeeze(1)
+
+    fillable = fine.mask > 0.5
+    refined_time = fine.fill_time.clone()  # Seeds at 0, everything else not filled yet
+    print(f"Refining {num_steps} coarse steps at ({H}, {W}) with {cfg.pyramid_refine_substeps} substeps each")
+    for t in range(1, num_steps + 1):
+        fine.filled_region.masked_fill_((up_time <= t - band) & fillable, 1.0)
+        fine.growth_limit = up_time <= t + band
+        for _ in range(cfg.pyramid_refine_substeps):
+            fine.step()
+        refined_time.masked_fill_((fine.filled_region > 0) & (refined_time == FILL_TIME_NOT_FILLED), t)
+
+    # Everything the coarse run reached is filled at the end
+    fine.filled_region.masked_fill_((up_time <= num_steps) & fillable, 1.0)
+    refined_time.masked_fill_((fine.filled_region > 0) & (refined_time == FILL_TIME_NOT_FILLED), num_steps)
+
+    fine.growth_limit = None
+    fine.fill_time = refined_time
+    fine.frame_count = num_steps
+    return fine
+
 # ────────────────────────────────────────────────────────────────────────────────
 #  COMFYUI NODE DEFINITION
 # ────────────────────────────────────────────────────────────────────────────────
@@ -631,6 +837,13 @@ class OrganicFillNode:
                 # Organic growth parameters
                 "circular_bias_strength": ("FLOAT", {"default": default_config.circular_bias_strength, "min": 0.0, "max": 1.0, "step": 0.01}),
                 "jitter_strength": ("FLOAT", {"default": default_config.jitter_strength, "min": 0.0, "max": 1.0, "step": 0.01}),
+                # Simulation loop parameters
+                "completion_check_interval": ("INT", {"default": default_config.completion_check_interval, "min": 1, "max": 1000}),
+                "diagnostics": ("BOOLEAN", {"default": default_config.diagnostics}),
+                "debug_maps": ("BOOLEAN", {"default": default_config.debug_maps}),
+                # Multi-resolution simulation
+                "pyramid_factor": (PYRAMID_FACTOR_CHOICES, {"default": default_config.pyramid_factor}),
+                "pyramid_refine_substeps": ("INT", {"default": default_config.pyramid_refine_substeps, "min": 1, "max": 8}),
             }
         }
 
@@ -638,8 +851,11 @@ class OrganicFillNode:
     # and a batch of frames (N, H, W) - requires custom handling downstream if used
     # and the growth probability map (B, H, W) in MASK format
     # and overlayed fill preview (N, H, W, C) showing mask animation on input image
-    RETURN_TYPES = ("MASK", "IMAGE", "MASK", "IMAGE")
-    RETURN_NAMES = ("final_mask", "frames_preview", "grow_prob_map", "overlayed_fill_preview")
+    # and the fill time map (B, H, W): step at which each pixel filled / total steps (1.0 = never filled),
+    # thresholding it at t in [0, 1] gives the fill state at that point of the animation
+    # and, if debug_maps is enabled, the individual growth probability maps (N, H, W, C) for batch item 0
+    RETURN_TYPES = ("MASK", "IMAGE", "MASK", "IMAGE", "MASK", "IMAGE")
+    RETURN_NAMES = ("final_mask", "frames_preview", "grow_prob_map", "overlayed_fill_preview", "fill_time_map", "debug_maps")
 
     FUNCTION = "execute"
     CATEGORY = "Eden 🌱/Experimental"
@@ -673,7 +889,12 @@ class OrganicFillNode:
                 neighbor_sampling_max: Optional[float] = None,
                 circular_radius_sensitivity: Optional[float] = None,
                 organic_bias_range: Optional[float] = None,
-                ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]: # Return mask BHW, frames NBHWC, grow_prob BHW, overlayed_fill_preview NHWC
+                completion_check_interval: Optional[int] = None,
+                diagnostics: Optional[bool] = None,
+                debug_maps: Optional[bool] = None,
+                pyramid_factor: Optional[int] = None,
+                pyramid_refine_substeps: Optional[int] = None,
+                ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]: # Return mask BHW, frames NBHWC, grow_prob BHW, overlayed_fill_preview NHWC, fill_time_map BHW, debug_maps NHWC
 
         start_time = time.time()
         device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -718,6 +939,11 @@ class OrganicFillNode:
             'neighbor_sampling_max': neighbor_sampling_max,
             'circular_radius_sensitivity': circular_radius_sensitivity,
             'organic_bias_range': organic_bias_range,
+            'completion_check_interval': completion_check_interval,
+            'diagnostics': diagnostics,
+            'debug_maps': debug_maps,
+            'pyramid_factor': pyramid_factor,
+            'pyramid_refine_substeps': pyramid_refine_substeps,
         }
         
         for key, value in param_mapping.items():
@@ -914,7 +1140,7 @@ class OrganicFillNode:
         sam_rgb_bhwc = _prep_sam_rgb(SAM_map)
 
         # --- Configure and Initialize Fill ---
-        fill = OrganicFillBatch(
+        fill_inputs = dict(
             input_image=input_image, # Pass original BHWC image
             base_mask=base_mask,     # Pass BHW mask
             seed_locations=seed_locations, # Pass BHW seed locations
@@ -922,111 +1148,114 @@ class OrganicFillNode:
             canny=canny_map_bhw,     # Pass BHW canny
             hed=hed_map_bhw,         # Pass BHW hed
             sam=sam_rgb_bhwc,        # Pass BHW samantic probability
-            config=cfg
         )
+        pyramid_factor = int(cfg.pyramid_factor)
+        if pyramid_factor not in PYRAMID_FACTOR_CHOICES:
+            raise ValueError(f"pyramid_factor must be one of {PYRAMID_FACTOR_CHOICES} (1 disables the pyramid, "
+                             f"smaller factors would not save any work), got {pyramid_factor}")
+        if pyramid_factor > 1:
+            # Growth advances about one pixel per step, so a coarse run needs ~1/factor of the steps
+            print(f"Pyramid mode: simulating at 1/{pyramid_factor} resolution, refining at ({H}, {W})")
+            fill = OrganicFillBatch(**_downsample_fill_inputs(fill_inputs, pyramid_factor), config=cfg)
+        else:
+            fill = OrganicFillBatch(**fill_inputs, config=cfg)
 
         # --- Run Fill Steps ---
-        frames: List[torch.Tensor] = [] # Store ALL BHW frames during simulation
+        # Frames are not stored: the fill keeps an int32 map of the step at which each pixel filled
         step = 0
         
+        check_interval = max(1, cfg.completion_check_interval)
         print(f"Starting fill loop with max_steps={max_steps}")
         while step < max_steps:
             boundary_pixels, fill_ratio = fill.step()
-            frames.append(fill.get_frame())
 
-            # DEBUG: Print progress every 50 steps or when no boundary pixels
-            if step % 50 == 0 or boundary_pixels == 0:
-                print(f"Step {step}: boundary_pixels={boundary_pixels}, fill_ratio={fill_ratio:.4f}")
-                
-            if fill.is_complete():
-                print(f"Fill completed early at step {step} due to is_complete() = True.")
-                print(f"--> Final fill ratio: {fill_ratio:.4f}")
-                break
-                
-            # DEBUG: Early warning if stuck
-            if step > 100 and boundary_pixels == 0:
-                print(f"WARNING: No boundary pixels at step {step}, but not marked complete!")
-                print(f"  Current fill ratio: {fill_ratio:.4f}")
+            # Reading step statistics syncs with the device, so only do it every few steps
+            if step % 50 == 0:
+                print(f"Step {step}: boundary_pixels={boundary_pixels.item()}, fill_ratio={fill_ratio.item():.4f}")
+
+            if (step + 1) % check_interval == 0:
+                if fill.is_complete():
+                    print(f"Fill completed early at step {step} due to is_complete() = True.")
+                    print(f"--> Final fill ratio: {fill_ratio.item():.4f}")
+                    break
+
+                # DEBUG: Early warning if stuck
+                if step > 100 and boundary_pixels.item() == 0:
+                    print(f"WARNING: No boundary pixels at step {step}, but not marked complete!")
+                    print(f"  Current fill ratio: {fill_ratio.item():.4f}")
 
             step += 1
 
+        if pyramid_factor > 1:
+            fill = refine_fill_pyramid(fill, fill_inputs, cfg)
+
         final_mask_bhw = fill.get_frame() # BHW float mask
         total_time = time.time() - start_time
         print(f"Organic fill finished in {total_time:.2f}s after {step} steps.")
         print(f"Final fill ratio: {fill.fill_ratio().mean().item():.4f}")
 
         # --- Extract exactly n_frames equally spaced frames ---
-        if not frames: # Handle case where no frames were generated (shouldn't happen)
-            print("Organic fill warning: No frames were generated.")
-            # Just return n_frames of ones:
-            selected_frames = [torch.ones((B, H, W), device=device, dtype=torch.float32)] * n_frames
-        elif len(frames) < n_frames:
-            # Repeat the last frame to reach n_frames:
-            selected_frames = frames + [frames[-1]] * (n_frames - len(frames))
-        else:
-            # Extract exactly n_frames equally spaced frames
-            if n_frames == 1:
-                selected_frames = [frames[-1]]
-            else:
-                # Create equally spaced indices from 0 to len(frames)-1
-                frame_indices = [int(i * (len(frames) - 1) / (n_frames - 1)) for i in range(n_frames)]
-                selected_frames = [frames[i] for i in frame_indices]
-            print(f"Extracted {len(selected_frames)} equally spaced frames from {len(frames)} total frames")
+        # Thresholding the event-time map at the selected steps reproduces the stored frames
+        num_steps = fill.frame_count
+        frame_steps = select_frame_steps(num_steps, n_frames)
+        print(f"Extracted {len(frame_steps)} equally spaced frames from {num_steps} total frames")
 
         # --- Prepare Outputs ---
         # Final Mask: BHW (ComfyUI MASK format)
-        # Frames Preview: Stack frames [N, B, H, W], convert to NBHWC for IMAGE type
-        if not selected_frames: # Handle case where no frames were selected (should not happen)
-            print("Warning: No frames were selected.")
-            frames_preview_nbhwc = torch.zeros((1, B, H, W, 1), device=device, dtype=torch.float32) # Placeholder
-            overlayed_fill_preview_nhwc = torch.zeros((1, H, W, 3), device=device, dtype=torch.float32) # Placeholder
-        else:
-            frames_nbhw = torch.stack(selected_frames) # [N, B, H, W]
-            # Convert NBHW (0/1 float) to NBHWC (grayscale float 0-1) for IMAGE output
-            frames_preview_nbhwc = frames_nbhw.unsqueeze(-1).expand(-1, -1, -1, -1, 3) # Repeat channel for RGB
-
-            # For simplicity in ComfyUI previews, often only the first batch item is shown.
-            # We'll return all batch items, but downstream nodes might only use frames_preview_nbhwc[:, 0, ...]
-            # Decision: Return only first batch item frames for preview to avoid huge tensors if batch > 1
-            frames_preview_nhwc = frames_preview_nbhwc[:, 0, :, :, :] # [N, H, W, C]
-            print(f"Returning final mask (B={B}, H={H}, W={W}) and frames preview (N={frames_preview_nhwc.shape[0]}, H={H}, W={W}, C=3) for batch item 0.")
-
-            # Create overlayed fill preview: overlay mask animation on input image with configurable alpha
-            # Get first batch item of input image for overlay
-            input_img_hwc = input_image[0] # [H, W, C]
-            # Ensure input image is RGB (3 channels)
-            if input_img_hwc.shape[-1] == 1: # Grayscale to RGB
-                input_img_hwc = input_img_hwc.expand(-1, -1, 3)
-            elif input_img_hwc.shape[-1] > 3: # Take first 3 channels
-                input_img_hwc = input_img_hwc[..., :3]
+        # Frames Preview: NHWC for IMAGE type
+        # For simplicity in ComfyUI previews, often only the first batch item is shown.
+        # Decision: Return only first batch item frames for preview to avoid huge tensors if batch > 1
+        frames_nhw = fill_time_to_frames(fill.fill_time[0], frame_steps) # [N, H, W]
+        # Convert NHW (0/1 float) to NHWC (grayscale float 0-1) for IMAGE output
+        frames_preview_nhwc = frames_nhw.unsqueeze(-1).expand(-1, -1, -1, 3) # Repeat channel for RGB
+        print(f"Returning final mask (B={B}, H={H}, W={W}) and frames preview (N={frames_preview_nhwc.shape[0]}, H={H}, W={W}, C=3) for batch item 0.")
+
+        # Create overlayed fill preview: overlay mask animation on input image with configurable alpha
+        # Get first batch item of input image for overlay
+        input_img_hwc = input_image[0] # [H, W, C]
+        # Ensure input image is RGB (3 channels)
+        if input_img_hwc.shape[-1] == 1: # Grayscale to RGB
+            input_img_hwc = input_img_hwc.expand(-1, -1, 3)
+        elif input_img_hwc.shape[-1] > 3: # Take first 3 channels
+            input_img_hwc = input_img_hwc[..., :3]
+        
+        N = frames_nhw.shape[0]
+        
+        # Create overlay with alpha blending
+        alpha = cfg.overlay_alpha
+        overlayed_frames = []
+        
+        for i in range(N):
+            frame_hw = frames_nhw[i] # [H, W] (0/1 float mask)
             
-            # Get frames for first batch item [N, H, W]
-            frames_nhw = frames_nbhw[:, 0, :, :] # [N, H, W]
-            N = frames_nhw.shape[0]
+            # Convert mask to RGB: white for filled areas, transparent for unfilled
+            # We'll use red color for the fill mask overlay
+            mask_rgb_hwc = torch.zeros_like(input_img_hwc) # [H, W, 3]
+            mask_rgb_hwc[..., 0] = frame_hw # Red channel = mask
             
-            # Create overlay with alpha blending
-            alpha = cfg.overlay_alpha
-            overlayed_frames = []
+            # Alpha blend: result = input * (1 - alpha * mask) + mask_color * (alpha * mask)
+            # For areas where mask is 1, blend with configured alpha
+            # For areas where mask is 0, keep original image
+            mask_alpha_hw = frame_hw * alpha # [H, W] - alpha only where mask is 1
+            mask_alpha_hwc = mask_alpha_hw.unsqueeze(-1).expand(-1, -1, 3) # [H, W, 3]
+            mask_alpha_hwc = mask_alpha_hwc.to(input_img_hwc.device)
             
-            for i in range(N):
-                frame_hw = frames_nhw[i] # [H, W] (0/1 float mask)
-                
-                # Convert mask to RGB: white for filled areas, transparent for unfilled
-                # We'll use red color for the fill mask overlay
-                mask_rgb_hwc = torch.zeros_like(input_img_hwc) # [H, W, 3]
-                mask_rgb_hwc[..., 0] = frame_hw # Red channel = mask
-                
-                # Alpha blend: result = input * (1 - alpha * mask) + mask_color * (alpha * mask)
-                # For areas where mask is 1, blend with configured alpha
-                # For areas where mask is 0, keep original image
-                mask_alpha_hw = frame_hw * alpha # [H, W] - alpha only where mask is 1
-                mask_alpha_hwc = mask_alpha_hw.unsqueeze(-1).expand(-1, -1, 3) # [H, W, 3]
-                mask_alpha_hwc = mask_alpha_hwc.to(input_img_hwc.device)
-                
-                overlayed_hwc = input_img_hwc * (1 - mask_alpha_hwc) + mask_rgb_hwc * mask_alpha_hwc
-                overlayed_frames.append(overlayed_hwc)
-            
-            overlayed_fill_preview_nhwc = torch.stack(overlayed_frames) # [N, H, W, C]
+            overlayed_hwc = input_img_hwc * (1 - mask_alpha_hwc) + mask_rgb_hwc * mask_alpha_hwc
+            overlayed_frames.append(overlayed_hwc)
+        
+        overlayed_fill_preview_nhwc = torch.stack(overlayed_frames) # [N, H, W, C]
+
+        # Normalized fill time map [B, H, W]: 0 for seeds, 1 for pixels that never filled
+        never_filled = fill.fill_time == FILL_TIME_NOT_FILLED
+        fill_time_map_bhw = torch.where(never_filled, torch.ones_like(fill.fill_time, dtype=torch.float32),
+                                        fill.fill_time.float() / max(num_steps, 1))
+
+        # Debug maps: one grayscale image per growth probability map, for batch item 0
+        if fill.debug_maps:
+            print(f"Returning debug maps: {list(fill.debug_maps.keys())}")
+            debug_maps_nhwc = torch.stack([m[0] for m in fill.debug_maps.values()]).unsqueeze(-1).expand(-1, -1, -1, 3)
+        else:
+            debug_maps_nhwc = torch.zeros((1, H, W, 3), device=device, dtype=torch.float32) # Placeholder
 
         # --- Scale Outputs Back to Original Resolution ---
         def _scale_back_to_original(tensor: torch.Tensor, target_h: int, target_w: int) -> torch.Tensor:
@@ -1062,11 +1291,17 @@ class OrganicFillNode:
             if overlayed_fill_preview_nhwc.numel() > 0:
                 overlayed_fill_preview_nhwc = _scale_back_to_original(overlayed_fill_preview_nhwc, orig_H, orig_W)
             
+            # Scale fill time map (nearest, so the step values are not blended)
+            fill_time_map_bhw = F.interpolate(fill_time_map_bhw.unsqueeze(1), size=(orig_H, orig_W), mode='nearest').squeeze(1)
+
+            # Scale debug maps
+            debug_maps_nhwc = _scale_back_to_original(debug_maps_nhwc, orig_H, orig_W)
+
             print(f"Final output dimensions: mask={final_mask_bhw.shape}, frames_preview={frames_preview_nhwc.shape}, grow_prob={fill.grow_prob.shape}, overlayed_preview={overlayed_fill_preview_nhwc.shape}")
 
         # ComfyUI expects MASK as [B, H, W] and IMAGE as [N, H, W, C] or [B, H, W, C]
         # We return final_mask_bhw and frames_preview_nhwc (frames for first batch item)
-        return final_mask_bhw, frames_preview_nhwc, fill.grow_prob, overlayed_fill_preview_nhwc
+        return final_mask_bhw, frames_preview_nhwc, fill.grow_prob, overlayed_fill_preview_nhwc, fill_time_map_bhw, debug_maps_nhwc
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -1150,8 +1385,8 @@ if __name__ == "__main__":
 
         # --- 5. Run Organic Fill Node ---
         fill_node = OrganicFillNode()
-        # Returns final_mask (BHW float), frames_preview (NHWC float for batch 0), grow_prob (BHW float), overlayed_fill_preview (NHWC float for batch 0)
-        final_mask_bhw, frames_preview_nhwc, grow_prob_bhw, overlayed_fill_preview_nhwc = fill_node.execute(**node_params)
+        # Returns final_mask (BHW float), frames_preview (NHWC float for batch 0), grow_prob (BHW float), overlayed_fill_preview (NHWC float for batch 0), fill_time_map (BHW float), debug_maps (NHWC float for batch 0)
+        final_mask_bhw, frames_preview_nhwc, grow_prob_bhw, overlayed_fill_preview_nhwc, _, _ = fill_node.execute(**node_params)
 
         # --- 6. Visualize & Save Outputs ---
         # Utilities expect HW uint8 mask, NHW uint8 frames, HWC uint8 input
@@ -1234,6 +1469,12 @@ if __name__ == "__main__":
         },
     ]
 
+    # --- Check the moment-based color similarity against the unfold reference ---
+    lab_check = torch.rand(2, 96, 128, 3)
+    max_err = (_compute_color_similarity_growth_prob(lab_check, 0.05) - _compute_color_similarity_growth_prob_unfold(lab_check, 0.05)).abs().max().item()
+    print(f"Color similarity max abs error vs unfold reference: {max_err:.2e}")
+    assert max_err < 1e-4
+
     # --- Run Tests ---
     for config in test_cases[:]:
         run_test_case(config, output_dir)